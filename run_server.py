@@ -1,30 +1,23 @@
 #!/usr/bin/env python3
-"""Run photo-hub web server directly from source."""
+"""Run photo-hub web server directly from source.
+
+Thin wrapper around ``photo-hub web``; any extra arguments (``--host``,
+``--port``, ``--reload``) are passed through to that command.
+"""
 
 import sys
 from pathlib import Path
 
-# Add src to path
-src_dir = Path(__file__).parent / "src"
-sys.path.insert(0, str(src_dir))
-
-# Import and run the app
-from photo_hub.web.api import app
-import uvicorn
-
 if __name__ == "__main__":
-    print("Starting photo-hub web server from source...")
-    print(f"API documentation: http://localhost:8000/docs")
-    print(f"Default database: ~/.photo-hub/database.db")
-    print("\nNote: To use AI features, set environment variables:")
+    # Add src to path
+    sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+    print("Note: To use AI features, set environment variables:")
     print("  For Gemini: export GOOGLE_API_KEY='your-key'")
     print("  For Qwen: export QWEN_API_KEY='your-key'")
-    print("\nPress Ctrl+C to stop the server")
-    
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
-        log_level="info",
-        reload=False
-    )
\ No newline at end of file
+    print()
+
+    from photo_hub.cli import main
+
+    sys.argv = [sys.argv[0], "web"] + sys.argv[1:]
+    main()
@@ -4,12 +4,12 @@ __version__ = "0.1.0"
 __author__ = "photo-hub contributors"
 __license__ = "MIT"
 
+import logging
 import sys
 from typing import Any, Dict, List, Optional
 
 # Public API
 from .main import hello, add, multiply, divide
-from .cli import main as cli_main
 
 __all__ = [
     "__version__",
@@ -22,13 +22,18 @@ __all__ = [
     "cli_main",
 ]
 
-# Optional: Initialize logging or configuration
-try:
-    import logging
 
-    logging.getLogger(__name__).addHandler(logging.NullHandler())
-except ImportError:
-    pass
+def __getattr__(name: str) -> Any:
+    """Lazily import the CLI entry point so importing the package stays cheap."""
+    if name == "cli_main":
+        from .cli import main as cli_main
+
+        return cli_main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Optional: Initialize logging or configuration
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 # Optional: Configuration dictionary
 config: Dict[str, Any] = {
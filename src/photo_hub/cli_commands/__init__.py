@@ -0,0 +1 @@
+"""Subcommands of `photo-hub photos`, each loaded lazily by its group."""
@@ -0,0 +1,335 @@
+"""The `photos scan` command."""
+
+import os
+import sys
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import click
+from ..cli_photos import _get_analyzer, _get_store, db_path_option
+
+if TYPE_CHECKING:
+    from photo_hub.photo_search.models import PhotoMetadata
+
+
+T = TypeVar("T")
+
+# Flush buffered scan progress after this many results or seconds
+ECHO_FLUSH_THRESHOLD = 64
+ECHO_FLUSH_INTERVAL = 1.0
+
+# Number of analysis results committed per transaction in synchronous scans
+SAVE_BATCH_SIZE = 100
+
+# Photos pulled from the directory walk per skip-existing lookup
+SCAN_CHUNK_SIZE = 256
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield successive lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run coro on uvloop's faster event loop when installed.
+    
+    Only this run gets a uvloop loop; the process-wide event loop policy
+    is left alone.
+    """
+    import asyncio
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    
+    if hasattr(uvloop, "run"):
+        return uvloop.run(coro)
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    # uvloop before 0.18 on Python before 3.11: manage the loop by hand
+    loop = uvloop.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+@click.command()
+@click.argument("directory", type=click.Path())
+@click.option("--recursive/--no-recursive", default=True, help="Scan subdirectories recursively")
+@click.option("--api-key", help="API key for the AI service (or set GOOGLE_API_KEY/QWEN_API_KEY environment variable)")
+@click.option("--model", default="gemini-2.0-flash-exp", help="Model to use (e.g., gemini-2.0-flash-exp, qwen-max, qwen-turbo, mock)")
+@click.option("--base-url", help="Custom base URL for API (for self-hosted or custom endpoints)")
+@db_path_option
+@click.option("--skip-existing", is_flag=True, help="Skip photos already analyzed")
+@click.option("--language", type=click.Choice(["en", "zh", "auto"]), default="auto", help="Language for analysis (en=English, zh=Chinese, auto=auto-detect)")
+@click.option("--mock", is_flag=True, help="Use mock analyzer for testing (no API calls)")
+@click.option("--max-concurrent", "--concurrency", "max_concurrent", type=int, help="Maximum concurrent API calls (default: 5 for Qwen, 3 for Gemini)")
+@click.option("--batch-size", type=int, default=10, help="Batch size for processing (default: 10)")
+@click.option("--batch-images", type=click.IntRange(min=1), default=1, help="Photos sent together in one API request (Gemini and Qwen; e.g. 8, default: 1)")
+@click.option("--async-mode/--sync-mode", default=True, help="Analyze photos concurrently (default) or one at a time")
+@click.pass_context
+def scan(ctx, directory, recursive, api_key, model, base_url, db_path, skip_existing, language, mock, max_concurrent, batch_size, batch_images, async_mode):
+    """Scan directory and analyze photos with AI models."""
+    import time
+    import traceback
+    try:
+        from photo_hub.photo_search.config import Language
+        from photo_hub.photo_search.scanner import iter_photos
+        from photo_hub.photo_search.metadata_store import BatchMetadataStore
+        from photo_hub.photo_search.gemini_client_new import MockPhotoAnalyzer
+    except ImportError as e:
+        click.echo(f"Error: Photo search dependencies not installed. Install with: pip install photo-hub[photo]", err=True)
+        click.echo(f"Detailed error: {e}", err=True)
+        ctx.exit(1)
+    
+    click.echo(f"Scanning directory: {directory} (recursive: {recursive})")
+    click.echo(f"Database: {db_path}")
+    
+    # Initialize components
+    store = _get_store(db_path)
+    
+    # Choose analyzer based on mock flag
+    if mock:
+        click.echo("Using mock analyzer (no API calls)")
+        analyzer = MockPhotoAnalyzer(model="mock")
+    else:
+        click.echo(f"Using model: {model}")
+        try:
+            analyzer = _get_analyzer(
+                model=model,
+                api_key=api_key,
+                base_url=base_url
+            )
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            ctx.exit(1)
+        except ImportError as e:
+            # Provide specific installation instructions based on model type
+            if model.lower().startswith("qwen"):
+                click.echo(f"Error: Missing dependencies for Qwen model '{model}'.", err=True)
+                click.echo(f"To install Qwen dependencies, run:", err=True)
+                click.echo(f"  pip install photo-hub[photo]", err=True)
+                click.echo(f"Or install specific packages:", err=True)
+                click.echo(f"  pip install openai pillow", err=True)
+            elif model.lower().startswith("gemini"):
+                click.echo(f"Error: Missing dependencies for Gemini model '{model}'.", err=True)
+                click.echo(f"To install Gemini dependencies, run:", err=True)
+                click.echo(f"  pip install photo-hub[photo]", err=True)
+                click.echo(f"Or install specific packages:", err=True)
+                click.echo(f"  pip install google-genai pillow", err=True)
+            else:
+                click.echo(f"Error: Missing dependencies for model '{model}'.", err=True)
+                click.echo(f"To install all photo analysis dependencies, run:", err=True)
+                click.echo(f"  pip install photo-hub[photo]", err=True)
+            click.echo(f"Detailed error: {e}", err=True)
+            ctx.exit(1)
+    
+    # Scan photos lazily so analysis starts before the directory walk finishes
+    try:
+        photo_iter = iter_photos(directory, recursive=recursive)
+    except ValueError as e:
+        # The scanner validates the directory itself, so Click does not stat it up front
+        click.echo(f"Error: {e}", err=True)
+        ctx.exit(1)
+    
+    # Convert language string to Language enum
+    language_enum = Language.normalize(language)
+    
+    # Set concurrency limits
+    if max_concurrent:
+        analyzer.set_concurrency_limit(max_concurrent)
+    analyzer.set_batch_size(batch_size)
+    analyzer.set_images_per_request(batch_images)
+    
+    found = 0
+    skipped_files = 0
+    reused_files = 0
+    
+    def photo_stream() -> Iterator["PhotoMetadata"]:
+        """Yield photos to analyze, dropping already analyzed ones if requested."""
+        nonlocal found, skipped_files, reused_files
+        if not skip_existing:
+            for photo in photo_iter:
+                found += 1
+                yield photo
+            return
+        
+        to_analyze = 0
+        for chunk in _chunked(photo_iter, SCAN_CHUNK_SIZE):
+            found += len(chunk)
+            # Look up by the analyzer's model so --mock runs skip their own results
+            existing = store.get_existing_paths(analyzer.model, [photo.path for photo in chunk])
+            new_photos = []
+            for photo in chunk:
+                if photo.path in existing:
+                    click.echo(f"Skipping already analyzed: {photo.filename}")
+                    skipped_files += 1
+                else:
+                    new_photos.append(photo)
+            
+            # Copies of already analyzed files reuse that analysis instead of an API call
+            new_paths = [photo.path for photo in new_photos]
+            hashes = store.content_hashes(new_paths)
+            duplicates = store.find_duplicate_analyses(analyzer.model, new_paths, hashes)
+            reused = []
+            for photo in new_photos:
+                result = duplicates.get(photo.path)
+                if result is None:
+                    # Carried over to the photo's result so saving it does not rehash the file
+                    photo.content_hash = hashes.get(photo.path)
+                    to_analyze += 1
+                    yield photo
+                else:
+                    click.echo(f"Reusing analysis of identical photo: {photo.filename}")
+                    reused.append(result)
+            
+            if reused:
+                failures = store.save_analysis_results_with_fallback(reused)
+                if failures:
+                    click.echo(f"  ✗ Failed to save {failures} reused results", err=True)
+                reused_files += len(reused) - failures
+        
+        # The walk is streamed, so the summary comes once it has finished
+        click.echo(f"After filtering, {to_analyze} photos to analyze (skipped {skipped_files})")
+    
+    # Analyze photos
+    successful = 0
+    failed = 0
+    
+    # Settle async vs sync before the directory walk is consumed, so a
+    # fallback never resumes from the middle of the scan
+    if async_mode and not hasattr(analyzer, "iter_analyze_async"):
+        click.echo("Async batch analysis not available, falling back to synchronous")
+        async_mode = False
+    
+    def analyze_sync(photos: Iterable["PhotoMetadata"]) -> None:
+        """Analyze photos one request at a time, saving results in batched transactions."""
+        nonlocal successful, failed
+        pending: List = []
+        
+        def flush_pending() -> None:
+            nonlocal successful, failed
+            failures = store.save_analysis_results_with_fallback(pending)
+            if failures:
+                click.echo(f"  ✗ Failed to save {failures} results", err=True)
+            successful -= failures
+            failed += failures
+            pending.clear()
+        
+        i = 0
+        for group in _chunked(photos, batch_images):
+            for photo in group:
+                i += 1
+                click.echo(f"Analyzing [{i}]: {photo.filename}")
+            try:
+                if len(group) == 1:
+                    results = [analyzer.analyze_photo(group[0].path, language=language_enum)]
+                else:
+                    # One multi-image request for the whole group
+                    results = analyzer.analyze_photos([photo.path for photo in group], language=language_enum)
+                content_hashes = {photo.path: photo.content_hash for photo in group}
+                for result in results:
+                    result.content_hash = content_hashes.get(result.photo_path)
+                    pending.append(result)
+                    successful += 1
+                    click.echo(f"  ✓ {result.description[:100]}...")
+            except Exception as e:
+                click.echo(f"  ✗ Error: {e}", err=True)
+                failed += len(group)
+                if ctx.obj.debug:
+                    traceback.print_exc()
+            if len(pending) >= SAVE_BATCH_SIZE:
+                flush_pending()
+        
+        if pending:
+            flush_pending()
+    
+    if async_mode:
+        # Use async processing
+        click.echo(f"Using async mode with {max_concurrent or 'default'} concurrent workers")
+        
+        async def analyze_async():
+            nonlocal successful, failed
+            
+            # Use batch store for better performance
+            batch_store = BatchMetadataStore(db_path, batch_size=50)
+            
+            # Buffer progress output so large scans do not issue two
+            # writes per photo
+            echo_buffer: List[str] = []
+            last_flush = time.monotonic()
+            
+            # Content hashes of photos submitted but not yet analyzed
+            in_flight: Dict[str, Optional[str]] = {}
+            
+            def paths() -> Iterator[str]:
+                for photo in photo_stream():
+                    in_flight[photo.path] = photo.content_hash
+                    yield photo.path
+            
+            # The whole scan streams through one window of requests, so
+            # nothing waits for the slowest photo of a chunk; each result is
+            # saved as it completes
+            results = analyzer.iter_analyze_async(
+                image_paths=paths(),
+                language=language_enum,
+                max_concurrent=max_concurrent or 5,
+                batch_size=batch_size
+            )
+            async for result in results:
+                result.content_hash = in_flight.pop(result.photo_path, None)
+                await batch_store.save_analysis_result_batch(result)
+                successful += 1
+                
+                desc = result.description[:100] if result.description else ""
+                echo_buffer.append(
+                    f"Analyzed [{successful}]: {os.path.basename(result.photo_path)}\n"
+                    f"  ✓ {desc}...\n"
+                )
+                now = time.monotonic()
+                if len(echo_buffer) >= ECHO_FLUSH_THRESHOLD or now - last_flush >= ECHO_FLUSH_INTERVAL:
+                    click.echo("".join(echo_buffer), nl=False)
+                    echo_buffer.clear()
+                    last_flush = now
+            
+            # Photos whose analysis raised are left out of the results
+            failed += len(in_flight)
+            
+            if echo_buffer:
+                click.echo("".join(echo_buffer), nl=False)
+            
+            # Flush pending batch writes
+            await batch_store.flush_batch()
+        
+        _run_async(analyze_async())
+    else:
+        # Synchronous processing
+        analyze_sync(photo_stream())
+    
+    click.echo(f"Found {found} photos")
+    if skipped_files > 0:
+        click.echo(f"Skipped {skipped_files} already analyzed photos")
+    if reused_files > 0:
+        click.echo(f"Reused existing analyses for {reused_files} duplicate photos")
+    
+    total_attempted = successful + failed
+    if total_attempted == 0:
+        click.echo("No photos to analyze.")
+        return
+    
+    click.echo(f"Analysis complete: {successful}/{total_attempted} successful, {failed} failed")
+    
+    # Show stats
+    stats = store.get_stats()
+    click.echo(f"\nDatabase statistics:")
+    click.echo(f"  Total photos: {stats.get('total_photos', 0)}")
+    click.echo(f"  Total analyses: {stats.get('total_analyses', 0)}")
+    click.echo(f"  Models used: {stats.get('models_used', 0)}")
@@ -0,0 +1,105 @@
+"""The `photos search` command and its Click-free fast path."""
+
+from typing import List
+
+import click
+from ..cli import _json_dumps
+from ..cli_photos import DEFAULT_DB_PATH, _get_store, db_path_option
+
+
+@click.command()
+@click.argument("query")
+@db_path_option
+@click.option("--limit", default=20, help="Maximum results to show")
+@click.option("--output-format", type=click.Choice(["text", "json"]), default="text", help="Output format")
+@click.pass_context
+def search(ctx, query, db_path, limit, output_format):
+    """Search analyzed photos by keywords."""
+    click.echo(f"Searching for: '{query}'")
+    
+    try:
+        store = _get_store(db_path)
+    except ImportError as e:
+        click.echo(f"Error: Photo search dependencies not installed. Install with: pip install photo-hub[photo]", err=True)
+        click.echo(f"Detailed error: {e}", err=True)
+        ctx.exit(1)
+    
+    results = store.search_photos(query, limit=limit)
+    
+    click.echo(_SEARCH_FORMATTERS[output_format](results))
+
+
+def _format_search_json(results: List[dict]) -> str:
+    """Render search results as JSON."""
+    return _json_dumps(results)
+
+
+def _format_search_text(results: List[dict]) -> str:
+    """Render search results as human-readable text."""
+    if not results:
+        return "No results found."
+    
+    lines = [f"Found {len(results)} results:"]
+    for i, result in enumerate(results, 1):
+        lines.append(f"\n{i}. {result['filename']}")
+        lines.append(f"   Path: {result['path']}")
+        if result.get('description'):
+            lines.append(f"   Description: {result['description'][:200]}...")
+        if result.get('tags'):
+            lines.append(f"   Tags: {', '.join(result['tags'][:10])}")
+    return "\n".join(lines)
+
+
+# Output format -> renderer used by the search command
+_SEARCH_FORMATTERS = {
+    "json": _format_search_json,
+    "text": _format_search_text,
+}
+
+# Options understood by the search fast path: option -> (parameter, converter)
+_FAST_SEARCH_OPTIONS = {
+    "--db-path": ("db_path", str),
+    "--limit": ("limit", int),
+    "--output-format": ("output_format", str),
+}
+
+
+def _fast_search(args: List[str]) -> bool:
+    """Run `photos search` for plain invocations without going through Click.
+
+    args are the arguments following ``photos search``. Returns False, before
+    producing any output, when they need the full Click command instead (help,
+    unknown options, invalid values or missing dependencies).
+    """
+    params = {"db_path": DEFAULT_DB_PATH, "limit": 20, "output_format": "text"}
+    query = None
+    arg_iter = iter(args)
+    for arg in arg_iter:
+        name, sep, value = arg.partition("=")
+        if name in _FAST_SEARCH_OPTIONS:
+            if not sep:
+                value = next(arg_iter, None)
+                if value is None:
+                    return False
+            key, convert = _FAST_SEARCH_OPTIONS[name]
+            try:
+                params[key] = convert(value)
+            except ValueError:
+                return False
+        elif arg.startswith("-") or query is not None:
+            return False
+        else:
+            query = arg
+    
+    if query is None or params["output_format"] not in _SEARCH_FORMATTERS:
+        return False
+    
+    try:
+        store = _get_store(params["db_path"])
+    except ImportError:
+        return False
+    
+    click.echo(f"Searching for: '{query}'")
+    results = store.search_photos(query, limit=params["limit"])
+    click.echo(_SEARCH_FORMATTERS[params["output_format"]](results))
+    return True
@@ -0,0 +1,32 @@
+"""The `photos stats` command."""
+
+import click
+from ..cli_photos import _get_store, db_path_option
+
+
+@click.command()
+@db_path_option
+@click.pass_context
+def stats(ctx, db_path):
+    """Show photo database statistics."""
+    try:
+        store = _get_store(db_path)
+    except ImportError as e:
+        click.echo(f"Error: Photo search dependencies not installed. Install with: pip install photo-hub[photo]", err=True)
+        click.echo(f"Detailed error: {e}", err=True)
+        ctx.exit(1)
+    
+    stats = store.get_stats()
+    
+    click.echo("Photo Database Statistics:")
+    click.echo(f"  Database file: {db_path}")
+    click.echo(f"  Total photos: {stats.get('total_photos', 0)}")
+    click.echo(f"  Total analyses: {stats.get('total_analyses', 0)}")
+    click.echo(f"  Models used: {stats.get('models_used', 0)}")
+    
+    # Additional stats if verbose
+    if ctx.obj.verbose:
+        per_model = stats.get("per_model", {})
+        if per_model:
+            click.echo("  Analyses by model:")
+            click.echo("\n".join(f"    {model}: {count}" for model, count in per_model.items()))
@@ -0,0 +1,63 @@
+"""CLI command for managing photo-hub configuration."""
+
+import sys
+
+import click
+from .cli import _json_dumps
+
+
+# Configuration keys that need converting from the command-line string
+_CONFIG_TYPES = {
+    "max_concurrent": int,
+    "batch_size": int,
+}
+
+
+@click.command()
+@click.option("--show", is_flag=True, help="Show current configuration")
+@click.option("--init", is_flag=True, help="Initialize configuration file with defaults")
+@click.option("--set", nargs=2, multiple=True, help="Set configuration value (e.g., --set model gemini-2.0-flash)")
+@click.option("--file", default=None, help="Configuration file path (default: auto-detect)")
+def config(show, init, set, file):
+    """Manage photo-hub configuration."""
+    try:
+        from photo_hub.web.config import WebConfig
+    except ImportError as e:
+        click.echo("Error: Web dependencies are not installed.", err=True)
+        click.echo("Install them with: pip install photo-hub[web]", err=True)
+        click.echo(f"Detailed error: {e}", err=True)
+        sys.exit(1)
+    
+    # Load config
+    config_obj, config_path = WebConfig.load_from_file_with_path(file)
+    
+    if init:
+        # Initialize with defaults
+        default_config = WebConfig()
+        default_config.save_to_file(config_path)
+        click.echo(f"Initialized configuration file at {config_path}")
+        click.echo("Default configuration:")
+        click.echo(_json_dumps(default_config.to_dict()))
+        return
+    
+    if set:
+        # Update configuration values
+        for key, value in set:
+            if key in WebConfig._FIELDS:
+                # Convert value to appropriate type
+                setattr(config_obj, key, _CONFIG_TYPES.get(key, str)(value))
+            else:
+                click.echo(f"Warning: Unknown configuration key '{key}'", err=True)
+        
+        # Save updated config
+        config_obj.save_to_file(config_path)
+        click.echo(f"Updated configuration saved to {config_path}")
+    
+    # Show configuration
+    if show or (not init and not set):
+        click.echo(f"Configuration file: {config_path}")
+        click.echo("Current configuration:")
+        click.echo(_json_dumps(config_obj.to_dict()))
+        click.echo("\nNote: API keys should be set via environment variables:")
+        click.echo("  For Gemini: export GOOGLE_API_KEY='your-key'")
+        click.echo("  For Qwen: export QWEN_API_KEY='your-key'")
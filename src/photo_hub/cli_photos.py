@@ -0,0 +1,55 @@
+"""CLI group for scanning and searching photos, plus helpers shared by its commands."""
+
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+import click
+from .cli import LazyGroup
+
+if TYPE_CHECKING:
+    from photo_hub.photo_search.base import PhotoAnalyzer
+    from photo_hub.photo_search.metadata_store import MetadataStore
+
+
+# Default location of the photo database
+DEFAULT_DB_PATH = "~/.photo-hub/database.db"
+db_path_option = click.option("--db-path", default=DEFAULT_DB_PATH, help="Database file path")
+
+# Guards the store cache so concurrent callers share one instance
+_factory_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _create_store(db_path: str) -> "MetadataStore":
+    from photo_hub.photo_search.metadata_store import MetadataStore
+    return MetadataStore(db_path)
+
+
+def _get_store(db_path: str) -> "MetadataStore":
+    """Return a MetadataStore for db_path, reused across commands in this process."""
+    with _factory_lock:
+        return _create_store(db_path)
+
+
+def _get_analyzer(model: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> "PhotoAnalyzer":
+    """Return a new analyzer for (model, api_key, base_url).
+    
+    Not cached like stores: scans configure their analyzer (concurrency,
+    batch sizes), and those settings must not carry over to the next scan.
+    """
+    from photo_hub.photo_search.factory import create_analyzer
+    return create_analyzer(model=model, api_key=api_key, base_url=base_url)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "scan": "photo_hub.cli_commands.scan:scan",
+        "search": "photo_hub.cli_commands.search:search",
+        "stats": "photo_hub.cli_commands.stats:stats",
+    },
+)
+def photos():
+    """Manage and search photos with AI analysis."""
+    pass
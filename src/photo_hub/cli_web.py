@@ -0,0 +1,32 @@
+"""CLI command for launching the photo-hub web interface."""
+
+import sys
+
+import click
+
+
+@click.command()
+@click.option("--host", default="0.0.0.0", help="Host to bind the web server to")
+@click.option("--port", default=8000, help="Port to run the web server on")
+@click.option("--reload", is_flag=True, help="Enable auto-reload for development")
+def web(host, port, reload):
+    """Launch the photo-hub web interface."""
+    try:
+        from photo_hub.web import app
+        import uvicorn
+    except ImportError as e:
+        click.echo("Error: Web dependencies are not installed.", err=True)
+        click.echo("Install them with: pip install photo-hub[web]", err=True)
+        click.echo(f"Detailed error: {e}", err=True)
+        sys.exit(1)
+    
+    click.echo(f"Starting photo-hub web server on http://{host}:{port}")
+    click.echo("Press Ctrl+C to stop the server")
+    
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        reload=reload,
+        log_level="info"
+    )
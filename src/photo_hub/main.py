@@ -82,12 +82,29 @@ def run(*args: Any, **kwargs: Any) -> int:
 
     parsed_args = parser.parse_args(args if args else sys.argv[1:])
 
+    return _run_impl(name=parsed_args.name, verbose=parsed_args.verbose, debug=parsed_args.debug)
+
+
+def _run_impl(name: str = "World", verbose: bool = False, debug: bool = False) -> int:
+    """Run the application with already parsed options.
+
+    Programmatic callers such as the Click CLI use this directly, which
+    skips building an argparse parser.
+
+    Args:
+        name: Name to greet.
+        verbose: Verbose output.
+        debug: Debug mode.
+
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
     # Configure logging
-    level = logging.DEBUG if parsed_args.debug else logging.INFO
+    level = logging.DEBUG if debug else logging.INFO
     logging.basicConfig(level=level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
     try:
-        greeting = hello(parsed_args.name)
+        greeting = hello(name)
         print(greeting)
 
         # Example calculations
@@ -97,7 +114,7 @@ def run(*args: Any, **kwargs: Any) -> int:
 
         return 0
     except Exception as e:
-        logger.error(f"Application error: {e}", exc_info=parsed_args.debug)
+        logger.error(f"Application error: {e}", exc_info=debug)
         return 1
 
 
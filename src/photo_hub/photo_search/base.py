@@ -1,15 +1,194 @@
 """Base analyzer interface for photo analysis with different AI models."""
 
 import asyncio
+import json
+import re
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
 from .models import AnalysisResult
 from .config import Language, resolve_language, get_prompt_for_language
 
+# Parse model responses with orjson when it is installed; its
+# JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+T = TypeVar("T")
+
+# Threads used by async analyzers to read, decode and encode images off the
+# event loop; threads are only started once an image is loaded
+IMAGE_LOAD_WORKERS = 8
+_IMAGE_LOAD_POOL = ThreadPoolExecutor(max_workers=IMAGE_LOAD_WORKERS, thread_name_prefix="photo-load")
+
+
+# Characters that matter when scanning for the end of a JSON value
+_JSON_TOKENS = re.compile(r'[\[\]{}"\\]')
+
+
+def extract_json(text: str, opener: str = "{") -> Optional[str]:
+    """Return the first balanced JSON object (or array) in text.
+    
+    Model responses often wrap JSON in markdown or prose. This scans
+    forward once from the first opener, skipping brackets inside strings,
+    and stops at the matching closer, so trailing text with braces is
+    never included.
+    
+    Args:
+        text: Response text to search
+        opener: "{" for an object, "[" for an array
+        
+    Returns:
+        The JSON substring, or None if there is no balanced value
+    """
+    start = text.find(opener)
+    if start < 0:
+        return None
+    depth = 0
+    in_string = False
+    escaped_at = -1
+    for match in _JSON_TOKENS.finditer(text, start):
+        i = match.start()
+        if i == escaped_at:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                escaped_at = i + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+@lru_cache(maxsize=None)
+def warn_if_slow_jpeg_decoder() -> None:
+    """Log a warning, once per process, if Pillow lacks libjpeg-turbo.
+    
+    JPEG decoding and resizing dominate preprocessing; stock Pillow wheels
+    ship libjpeg-turbo, but some source builds fall back to plain libjpeg.
+    """
+    from PIL import features
+    if not features.check_feature("libjpeg_turbo"):
+        import logging
+        logging.getLogger(__name__).warning(
+            "Pillow was built without libjpeg-turbo; JPEG decoding will be slower. "
+            "Install a stock Pillow wheel or pillow-simd for faster preprocessing."
+        )
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return whether an API error reports that the rate limit was hit."""
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource_exhausted" in message
+
+
+class AdaptiveRateLimiter:
+    """Adaptive rate limiter that adjusts delays based on API responses.
+    
+    The delay is the minimum spacing between request starts. Callers
+    acquire a slot before each request, so nobody sleeps after the last
+    call or longer than the spacing requires. After each request, callers
+    report the outcome with adjust_delay (or adjust_delay_sync): the delay
+    shrinks after success_threshold successes in a row and grows on errors,
+    by repeated_error_backoff once more than error_threshold errors follow
+    each other and by error_backoff before that.
+    """
+    
+    def __init__(
+        self,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.1,
+        max_delay: float = 60.0,
+        success_threshold: int = 10,
+        error_threshold: int = 2,
+        error_backoff: float = 1.2,
+        repeated_error_backoff: float = 1.5,
+    ):
+        self.delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.success_threshold = success_threshold
+        self.error_threshold = error_threshold
+        self.error_backoff = error_backoff
+        self.repeated_error_backoff = repeated_error_backoff
+        self.success_count = 0
+        self.error_count = 0
+        self.consecutive_errors = 0
+        self._next_available = 0.0
+        # Sync callers may run in several threads; nothing awaits while it
+        # is held, so async callers can take it too
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Reserve the next request slot and return the seconds until it starts."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_available)
+            self._next_available = start + self.delay
+            return start - now
+    
+    async def acquire(self):
+        """Wait until the next request may start."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+    
+    def acquire_sync(self):
+        """Block until the next request may start."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+    
+    async def adjust_delay(self, success: bool, rate_limited: bool = False):
+        """Adjust delay based on API call success."""
+        self.adjust_delay_sync(success, rate_limited)
+    
+    def adjust_delay_sync(self, success: bool, rate_limited: bool = False):
+        """Adjust delay based on API call success, for synchronous callers."""
+        with self._lock:
+            if success:
+                self.success_count += 1
+                self.consecutive_errors = 0
+                # If we have many successes, reduce delay
+                if self.success_count > self.success_threshold:
+                    self.delay = max(self.min_delay, self.delay * 0.9)
+                    self.success_count = 0
+            else:
+                self.error_count += 1
+                self.consecutive_errors += 1
+                self.success_count = 0
+                # Increase delay on errors
+                if self.consecutive_errors > self.error_threshold:
+                    self.delay = min(self.max_delay, self.delay * self.repeated_error_backoff)
+                else:
+                    self.delay = min(self.max_delay, self.delay * self.error_backoff)
+                # Rate-limited responses also push back the next request
+                if rate_limited:
+                    self._next_available = max(self._next_available, time.monotonic() + self.delay)
+
 
 class PhotoAnalyzer(ABC):
     """Abstract base class for photo analyzers."""
     
+    # Photos sent per API request; analyzers that support multi-image
+    # requests raise this through set_images_per_request
+    _images_per_request: int = 1
+    
     @property
     @abstractmethod
     def model(self) -> str:
@@ -44,6 +223,54 @@ class PhotoAnalyzer(ABC):
         """
         pass
     
+    def iter_analyze(self, image_paths: Iterable[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> Iterator[AnalysisResult]:
+        """Analyze photos one request at a time, yielding each result as it is ready.
+        
+        Unlike batch_analyze, results are never collected, so memory use
+        does not grow with the number of photos. Photos that fail to
+        analyze are logged and skipped.
+        
+        Args:
+            image_paths: Paths to image files, consumed lazily
+            prompt: Optional custom prompt for analysis
+            language: Language for analysis (defaults to AUTO, which resolves to English)
+            
+        Yields:
+            AnalysisResult objects in the order of image_paths
+        """
+        if prompt is None:
+            # Resolve the default once rather than once per request
+            prompt = get_prompt_for_language(language)
+        images_per_request = self._images_per_request
+        paths = iter(image_paths)
+        for group in iter(lambda: list(islice(paths, images_per_request)), []):
+            try:
+                if len(group) == 1:
+                    results = [self.analyze_photo(group[0], prompt, language)]
+                else:
+                    results = self.analyze_photos(group, prompt, language)
+            except Exception as e:
+                import logging
+                logging.getLogger(__name__).error(f"Failed to analyze {', '.join(group)}: {e}")
+                continue
+            yield from results
+    
+    def analyze_photos(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
+        """Analyze a group of photos, in a single API request where supported.
+        
+        Unlike batch_analyze, a failure fails the whole group.
+        
+        Args:
+            image_paths: List of paths to image files
+            prompt: Optional custom prompt for analysis
+            language: Language for analysis (defaults to AUTO, which resolves to English)
+            
+        Returns:
+            List of AnalysisResult objects, in the order of image_paths
+        """
+        # Default implementation sends one request per photo
+        return [self.analyze_photo(path, prompt, language) for path in image_paths]
+    
     async def analyze_photo_async(self, image_path: str, prompt: Optional[str] = None, language: Language = Language.AUTO) -> AnalysisResult:
         """Asynchronously analyze a single photo.
         
@@ -58,6 +285,20 @@ class PhotoAnalyzer(ABC):
         # Default implementation falls back to synchronous version
         return self.analyze_photo(image_path, prompt, language)
     
+    async def analyze_photos_async(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
+        """Asynchronously analyze a group of photos, in a single API request where supported.
+        
+        Args:
+            image_paths: List of paths to image files
+            prompt: Optional custom prompt for analysis
+            language: Language for analysis (defaults to AUTO, which resolves to English)
+            
+        Returns:
+            List of AnalysisResult objects, in the order of image_paths
+        """
+        # Default implementation sends one request per photo
+        return [await self.analyze_photo_async(path, prompt, language) for path in image_paths]
+    
     async def batch_analyze_async(
         self, 
         image_paths: List[str], 
@@ -76,37 +317,193 @@ class PhotoAnalyzer(ABC):
             batch_size: Number of photos to process in each batch (for memory management)
             
         Returns:
-            List of AnalysisResult objects
+            List of AnalysisResult objects in the order of image_paths;
+            photos that fail to analyze are left out
+        """
+        results = [
+            result
+            async for result in self.iter_analyze_async(
+                image_paths, prompt, language, max_concurrent, batch_size
+            )
+        ]
+        # Results arrive in completion order; restore the input order
+        order = {path: i for i, path in enumerate(image_paths)}
+        results.sort(key=lambda result: order[result.photo_path])
+        return results
+    
+    async def iter_analyze_async(
+        self, 
+        image_paths: Iterable[str], 
+        prompt: Optional[str] = None, 
+        language: Language = Language.AUTO,
+        max_concurrent: int = 5,
+        batch_size: int = 10
+    ) -> AsyncIterator[AnalysisResult]:
+        """Asynchronously analyze multiple photos, yielding results as they complete.
+        
+        Unlike batch_analyze_async, results are not buffered, so callers can
+        persist each one while the rest of the batch is still in flight.
+        Photos that fail to analyze are logged and skipped.
+        
+        Args:
+            image_paths: Paths to image files; any iterable, read lazily as
+                requests finish, so a whole scan can stream through one window
+            prompt: Optional custom prompt for analysis
+            language: Language for analysis (defaults to AUTO, which resolves to English)
+            max_concurrent: Maximum number of concurrent API calls
+            batch_size: Number of photos in flight at once (for memory management);
+                at least max_concurrent requests so the semaphore is never starved
+            
+        Yields:
+            AnalysisResult objects in completion order
         """
-        results = []
+        if prompt is None:
+            # Resolve the default once rather than once per request
+            prompt = get_prompt_for_language(language)
         semaphore = asyncio.Semaphore(max_concurrent)
         
-        async def process_image(path: str) -> Optional[AnalysisResult]:
+        async def process_group(group: List[str]) -> List[AnalysisResult]:
             async with semaphore:
                 try:
-                    return await self.analyze_photo_async(path, prompt, language)
+                    if len(group) == 1:
+                        return [await self.analyze_photo_async(group[0], prompt, language)]
+                    return await self.analyze_photos_async(group, prompt, language)
                 except Exception as e:
                     import logging
-                    logging.getLogger(__name__).error(f"Failed to analyze {path}: {e}")
-                    return None
-        
-        # Process in batches to manage memory
-        for i in range(0, len(image_paths), batch_size):
-            batch = image_paths[i:i + batch_size]
-            tasks = [process_image(path) for path in batch]
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+                    logging.getLogger(__name__).error(f"Failed to analyze {', '.join(group)}: {e}")
+                    return []
+        
+        # Each task analyzes one group of photos; groups hold a single photo
+        # unless the analyzer sends several images per request
+        images_per_request = self._images_per_request
+        paths = iter(image_paths)
+        groups = iter(lambda: list(islice(paths, images_per_request)), [])
+        
+        # Keep a sliding window of tasks in flight: each finished group is
+        # replaced immediately, so one slow call never stalls a whole batch
+        pending = {
+            asyncio.ensure_future(process_group(group))
+            for group in islice(groups, max(batch_size // images_per_request, max_concurrent))
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.update(asyncio.ensure_future(process_group(group)) for group in islice(groups, len(done)))
+                for task in done:
+                    for result in task.result():
+                        yield result
+        finally:
+            # Don't leave work running if the caller stops early
+            for task in pending:
+                task.cancel()
+    
+    async def _run_in_io_pool(self, func: Callable[..., T], *args: Any) -> T:
+        """Run blocking image I/O or encoding in a worker thread.
+        
+        Keeps file reads and PIL/base64 work from stalling the event loop
+        while other requests are in flight.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_IMAGE_LOAD_POOL, func, *args)
+    
+    def _submit_to_io_pool(self, func: Callable[..., T], *args: Any) -> "Future[T]":
+        """Start blocking image I/O or encoding in a worker thread.
+        
+        Synchronous counterpart of _run_in_io_pool, for loading the next
+        photos while the current request is in flight.
+        """
+        return _IMAGE_LOAD_POOL.submit(func, *args)
+    
+    def _parse_response(self, response_text: str, image_path: str) -> AnalysisResult:
+        """Parse a single-photo response into an AnalysisResult.
+        
+        Falls back to using the whole response as the description when it
+        holds no usable JSON object.
+        """
+        try:
+            # Fast path: JSON-mode responses are the object itself
+            data = json_loads(response_text)
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
+            # The object might be wrapped in markdown code blocks or prose
+            json_text = extract_json(response_text)
+            if json_text is None:
+                import logging
+                logging.getLogger(__name__).warning(f"No JSON found in response for {image_path}")
+                return self._fallback_result(response_text, image_path)
+            try:
+                data = json_loads(json_text)
+            except json.JSONDecodeError as e:
+                import logging
+                logging.getLogger(__name__).error(f"Failed to parse JSON response for {image_path}: {e}")
+                return self._fallback_result(response_text, image_path)
+        
+        return AnalysisResult(
+            photo_path=image_path,
+            llm_model=self.model,
+            description=data.get("description", ""),
+            people=data.get("people", []),
+            locations=data.get("locations", []),
+            objects=data.get("objects", []),
+            tags=data.get("tags", []),
+            generated_at=datetime.now()
+        )
+    
+    def _fallback_result(self, response_text: str, image_path: str) -> AnalysisResult:
+        """Build a result that keeps an unparseable response as the description."""
+        return AnalysisResult(
+            photo_path=image_path,
+            llm_model=self.model,
+            description=response_text.strip(),
+            people=[],
+            locations=[],
+            objects=[],
+            tags=[],
+            generated_at=datetime.now()
+        )
+    
+    def _parse_batch_response(self, response_text: str, image_paths: List[str]) -> List[AnalysisResult]:
+        """Parse a multi-image response holding a JSON array into AnalysisResults.
+        
+        Args:
+            response_text: Raw model response
+            image_paths: Paths of the photos sent, in request order
             
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    continue
-                if result is not None:
-                    results.append(result)
+        Returns:
+            List of AnalysisResult objects, in the order of image_paths
             
-            # Clear batch to free memory
-            del batch
-            del tasks
+        Raises:
+            ValueError: If the response is not a JSON array with one object per photo
+        """
+        # The array might be wrapped in markdown code blocks
+        json_text = extract_json(response_text, "[")
+        if json_text is None:
+            raise ValueError(f"No JSON array found in response for {len(image_paths)} photos")
+        try:
+            items = json_loads(json_text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse JSON array response: {e}")
+        if not isinstance(items, list) or len(items) != len(image_paths):
+            raise ValueError(
+                f"Expected {len(image_paths)} analyses in response, "
+                f"got {len(items) if isinstance(items, list) else 0}"
+            )
         
-        return results
+        generated_at = datetime.now()
+        return [
+            AnalysisResult(
+                photo_path=image_path,
+                llm_model=self.model,
+                description=data.get("description", ""),
+                people=data.get("people", []),
+                locations=data.get("locations", []),
+                objects=data.get("objects", []),
+                tags=data.get("tags", []),
+                generated_at=generated_at
+            )
+            for image_path, data in zip(image_paths, items)
+        ]
     
     def set_rate_limit_delay(self, seconds: float) -> None:
         """Set delay between API calls (for rate limiting).
@@ -133,4 +530,13 @@ class PhotoAnalyzer(ABC):
             batch_size: Number of items to process in each batch
         """
         # Default implementation does nothing
-        pass
\ No newline at end of file
+        pass
+    
+    def set_images_per_request(self, images_per_request: int) -> None:
+        """Set how many photos are sent together in one API request.
+        
+        Args:
+            images_per_request: Number of images per request
+        """
+        # Default implementation does nothing
+        pass
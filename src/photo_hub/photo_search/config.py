@@ -13,16 +13,20 @@ class Language(str, Enum):
     @classmethod
     def normalize(cls, language: str) -> "Language":
         """Normalize language string to Language enum."""
-        language_lower = language.lower().strip()
-        if language_lower in ("en", "english", "eng"):
-            return cls.EN
-        elif language_lower in ("zh", "chinese", "cn", "zh-cn", "zh_cn"):
-            return cls.ZH
-        elif language_lower in ("auto", "automatic"):
-            return cls.AUTO
-        else:
+        # Exact aliases hit on the first lookup; only other spellings are folded
+        normalized = _LANGUAGE_ALIASES.get(language)
+        if normalized is None:
             # Default to English for unknown languages
-            return cls.EN
+            normalized = _LANGUAGE_ALIASES.get(language.lower().strip(), cls.EN)
+        return normalized
+
+
+# Accepted spellings for each language, checked by Language.normalize
+_LANGUAGE_ALIASES: Dict[str, Language] = {
+    **dict.fromkeys(("en", "english", "eng"), Language.EN),
+    **dict.fromkeys(("zh", "chinese", "cn", "zh-cn", "zh_cn"), Language.ZH),
+    **dict.fromkeys(("auto", "automatic"), Language.AUTO),
+}
 
 
 # Default prompt templates for different languages
@@ -61,6 +65,21 @@ Return the analysis in this exact JSON format:
 }
 
 
+_DEFAULT_PROMPT = DEFAULT_PROMPTS[Language.EN]
+
+
+# Appended to the prompt when several photos are sent in one request
+MULTI_IMAGE_INSTRUCTIONS: Dict[Language, str] = {
+    Language.EN: """
+
+This request contains {count} photos. Analyze each photo separately and return a JSON array of exactly {count} objects in the format above, one per photo, in the order the photos are given.""",
+    
+    Language.ZH: """
+
+本次请求包含{count}张照片。请分别分析每张照片，并按照片给出的顺序返回一个包含{count}个上述格式对象的JSON数组，每张照片对应一个对象。""",
+}
+
+
 def get_prompt_for_language(language: Language) -> str:
     """Get the default prompt for the specified language.
     
@@ -73,15 +92,25 @@ def get_prompt_for_language(language: Language) -> str:
     Raises:
         ValueError: If language is AUTO (should be resolved first)
     """
-    if language == Language.AUTO:
-        # Default to English for auto detection
-        return DEFAULT_PROMPTS[Language.EN]
-    
-    if language not in DEFAULT_PROMPTS:
-        # Fall back to English for unsupported languages
-        return DEFAULT_PROMPTS[Language.EN]
+    # AUTO and unsupported languages fall back to English
+    return DEFAULT_PROMPTS.get(language, _DEFAULT_PROMPT)
+
+
+def get_multi_image_prompt(prompt: str, count: int, language: Language) -> str:
+    """Extend a single-photo prompt to ask for one result per photo.
     
-    return DEFAULT_PROMPTS[language]
+    Args:
+        prompt: Prompt describing how to analyze one photo
+        count: Number of photos sent with the prompt
+        language: Language enum value
+        
+    Returns:
+        Prompt string requesting a JSON array with count objects
+    """
+    instruction = MULTI_IMAGE_INSTRUCTIONS.get(
+        resolve_language(language), MULTI_IMAGE_INSTRUCTIONS[Language.EN]
+    )
+    return prompt + instruction.format(count=count)
 
 
 def resolve_language(language: Language) -> Language:
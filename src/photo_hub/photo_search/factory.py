@@ -1,10 +1,22 @@
 """Factory for creating photo analyzers based on model names."""
 
-import re
+import importlib
 import logging
-from typing import Optional, Dict, Any
+import os
+from typing import Optional, Tuple
 from .base import PhotoAnalyzer
 
+# Model prefix -> (analyzer class as "module:Class", API key environment
+# variables, provider name). Only the matching analyzer's module is imported.
+_ANALYZER_REGISTRY: Tuple[Tuple[str, str, Tuple[str, ...], str], ...] = (
+    ("mock", "photo_hub.photo_search.gemini_client_new:MockPhotoAnalyzer", (), "Mock"),
+    ("gemini", "photo_hub.photo_search.gemini_client_new:GeminiPhotoAnalyzer", ("GOOGLE_API_KEY",), "Gemini"),
+    ("qwen", "photo_hub.photo_search.qwen_client:QwenPhotoAnalyzer", ("QWEN_API_KEY", "DASHSCOPE_API_KEY"), "Qwen"),
+)
+
+# Qwen vision-language models recommended for photo analysis
+_QWEN_VL_RECOMMENDED = frozenset({"qwen-vl-plus", "qwen-vl-max", "qwen-vl-chat"})
+
 
 def create_analyzer(
     model: str,
@@ -29,40 +41,31 @@ def create_analyzer(
     """
     model_lower = model.lower()
     
-    # Check for mock analyzer
-    if model_lower.startswith("mock"):
-        from .gemini_client_new import MockPhotoAnalyzer
-        return MockPhotoAnalyzer(model=model)
-    
-    # Check for Gemini models
-    if model_lower.startswith("gemini"):
-        from .gemini_client_new import GeminiPhotoAnalyzer
-        if not api_key:
-            # Try to get from environment variable
-            import os
-            api_key = os.environ.get("GOOGLE_API_KEY")
-            if not api_key:
-                raise ValueError(
-                    "API key required for Gemini models. "
-                    "Provide --api-key or set GOOGLE_API_KEY environment variable."
-                )
-        return GeminiPhotoAnalyzer(api_key=api_key, model=model, **kwargs)
-    
-    # Check for Qwen models
-    if model_lower.startswith("qwen"):
-        from .qwen_client import QwenPhotoAnalyzer
+    for prefix, class_path, key_env_vars, provider in _ANALYZER_REGISTRY:
+        if not model_lower.startswith(prefix):
+            continue
+        
+        module_name, class_name = class_path.split(":")
+        analyzer_class = getattr(importlib.import_module(module_name), class_name)
+        
+        # Mock analyzer needs no credentials
+        if not key_env_vars:
+            return analyzer_class(model=model)
+        
         if not api_key:
-            # Try to get from environment variable
-            import os
-            api_key = os.environ.get("QWEN_API_KEY") or os.environ.get("DASHSCOPE_API_KEY")
+            # Try to get from environment variables
+            api_key = next(filter(None, map(os.environ.get, key_env_vars)), None)
             if not api_key:
                 raise ValueError(
-                    "API key required for Qwen models. "
-                    "Provide --api-key or set QWEN_API_KEY/DASHSCOPE_API_KEY environment variable."
+                    f"API key required for {provider} models. "
+                    f"Provide --api-key or set {'/'.join(key_env_vars)} environment variable."
                 )
         
+        if prefix != "qwen":
+            return analyzer_class(api_key=api_key, model=model, **kwargs)
+        
         # Provide helpful hints for VL models
-        if "vl" in model_lower and model_lower not in ["qwen-vl-plus", "qwen-vl-max", "qwen-vl-chat"]:
+        if "vl" in model_lower and model_lower not in _QWEN_VL_RECOMMENDED:
             logger = logging.getLogger(__name__)
             logger.info(
                 f"Note: Using Qwen VL model '{model}'. "
@@ -70,7 +73,7 @@ def create_analyzer(
                 f"qwen-vl-plus, qwen-vl-max, qwen-vl-chat"
             )
         
-        return QwenPhotoAnalyzer(api_key=api_key, model=model, base_url=base_url, **kwargs)
+        return analyzer_class(api_key=api_key, model=model, base_url=base_url, **kwargs)
     
     # Try to infer from common patterns
     if "gpt" in model_lower or "openai" in model_lower:
@@ -1,30 +1,37 @@
 """Gemini API client for photo analysis using the new google.genai library."""
 
 import asyncio
-import base64
 import logging
+import os
 import time
-import json
-import re
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
 from PIL import Image
 import io
 from datetime import datetime
 
-try:
-    import google.genai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    genai = None
+# google.genai is slow to import and the mock analyzer never needs it, so
+# it is imported by the first GeminiPhotoAnalyzer, see _import_genai
+genai: Any = None
+genai_types: Any = None
 
 from photo_hub.photo_search.models import AnalysisResult
-from photo_hub.photo_search.base import PhotoAnalyzer
-from photo_hub.photo_search.config import Language, get_prompt_for_language, resolve_language
+from photo_hub.photo_search.base import AdaptiveRateLimiter, PhotoAnalyzer, is_rate_limit_error, warn_if_slow_jpeg_decoder
+from photo_hub.photo_search.config import Language, get_multi_image_prompt, get_prompt_for_language, resolve_language
 
 logger = logging.getLogger(__name__)
 
+# Images Gemini accepts as-is; files in these formats that need no resizing
+# are uploaded byte for byte instead of being decoded and re-encoded
+PASSTHROUGH_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+PASSTHROUGH_MAX_BYTES = 4 * 1024 * 1024
+MAX_IMAGE_SIZE = 2048
+
+# Seconds a fetched model list is reused for "model not found" suggestions
+MODEL_LIST_TTL = 300.0
+DEFAULT_SUGGESTED_MODELS = ("gemini-2.0-flash-exp", "gemini-flash-latest", "gemini-2.5-flash")
+
 # Default prompt for photo analysis
 DEFAULT_PROMPT = """Analyze this photo and provide a detailed description. Include:
 1. Main scene description (what is happening in the photo)
@@ -43,82 +50,155 @@ Return the analysis in this exact JSON format:
 }"""
 
 
-class AdaptiveRateLimiter:
-    """Adaptive rate limiter that adjusts delays based on API responses."""
-    
-    def __init__(self, initial_delay: float = 30.0, min_delay: float = 1.0, max_delay: float = 120.0):
-        self.delay = initial_delay
-        self.min_delay = min_delay
-        self.max_delay = max_delay
-        self.success_count = 0
-        self.error_count = 0
-        self.consecutive_errors = 0
-        self._lock = asyncio.Lock()
+def _supports_generate(model: Any) -> bool:
+    """Return whether a listed model is a Gemini model usable for generateContent."""
+    name = getattr(model, "name", None)
+    if not name or "gemini" not in name.lower() or "embedding" in name.lower():
+        return False
+    # Newer SDK versions report the supported actions; trust them when present
+    actions = getattr(model, "supported_actions", None)
+    return actions is None or "generateContent" in actions
+
+
+def _import_genai() -> None:
+    """Import google.genai into the module globals on first use.
     
-    async def wait(self):
-        """Wait for the current delay period."""
-        await asyncio.sleep(self.delay)
+    Raises:
+        ImportError: If google-genai is not installed
+    """
+    global genai, genai_types
+    if genai is not None:
+        return
+    try:
+        import google.genai as genai_module
+        from google.genai import types as genai_types_module
+    except ImportError:
+        raise ImportError(
+            "google.genai not installed. "
+            "Install with: pip install google-genai"
+        )
+    genai, genai_types = genai_module, genai_types_module
+
+
+@lru_cache(maxsize=16)
+def _prompt_part(prompt: str) -> Any:
+    """Text part for a prompt, built once per distinct prompt.
     
-    async def adjust_delay(self, success: bool):
-        """Adjust delay based on API call success."""
-        async with self._lock:
-            if success:
-                self.success_count += 1
-                self.consecutive_errors = 0
-                # If we have many successes, reduce delay
-                if self.success_count > 5:  # Gemini free tier is more restrictive
-                    self.delay = max(self.min_delay, self.delay * 0.9)
-                    self.success_count = 0
-            else:
-                self.error_count += 1
-                self.consecutive_errors += 1
-                self.success_count = 0
-                # Increase delay on errors
-                if self.consecutive_errors > 1:  # Gemini is sensitive to errors
-                    self.delay = min(self.max_delay, self.delay * 2.0)
-                elif self.consecutive_errors > 0:
-                    self.delay = min(self.max_delay, self.delay * 1.5)
+    Requests in a batch share the same prompt, so the SDK converts and
+    validates its text once rather than for every photo.
+    """
+    return genai_types.Part.from_text(text=prompt)
+
+
+def _analysis_schema() -> Any:
+    """Schema of one photo analysis, matching the JSON the prompts ask for."""
+    string_list = genai_types.Schema(type=genai_types.Type.ARRAY, items=genai_types.Schema(type=genai_types.Type.STRING))
+    return genai_types.Schema(
+        type=genai_types.Type.OBJECT,
+        properties={
+            "description": genai_types.Schema(type=genai_types.Type.STRING),
+            "people": string_list,
+            "locations": string_list,
+            "objects": string_list,
+            "tags": string_list,
+        },
+        required=["description", "people", "locations", "objects", "tags"],
+    )
 
 
 class GeminiPhotoAnalyzer(PhotoAnalyzer):
     """Analyze photos using Gemini API with the new google.genai library."""
     
+    # (fetched_at, model IDs) shared by all instances, see _get_suggested_models
+    _model_list_cache: Optional[Tuple[float, List[str]]] = None
+    
     def __init__(self, api_key: str, model: str = "gemini-2.0-flash-exp"):
-        if not GEMINI_AVAILABLE:
-            raise ImportError(
-                "google.genai not installed. "
-                "Install with: pip install google-genai"
-            )
+        _import_genai()
+        
+        warn_if_slow_jpeg_decoder()
         
-        self.client = genai.Client(api_key=api_key)  # type: ignore
+        self.client = genai.Client(api_key=api_key)
         self._model = model
-        self._rate_limit_delay = 30  # seconds between requests (for free tier)
+        self._rate_limit_delay = 10  # seconds between request starts (~6 RPM, for free tier)
         self._max_concurrent = 3  # Gemini free tier has stricter limits
         self._batch_size = 5
+        self._images_per_request = 1
         
         # Initialize adaptive rate limiter
-        self.rate_limiter = AdaptiveRateLimiter(initial_delay=30.0)
+        # The Gemini free tier is restrictive: speed up slowly, back off fast
+        self.rate_limiter = AdaptiveRateLimiter(
+            initial_delay=10.0,
+            min_delay=1.0,
+            max_delay=120.0,
+            success_threshold=5,
+            error_threshold=1,
+            error_backoff=1.5,
+            repeated_error_backoff=2.0,
+        )
+        
+        # Constrain responses to the analysis JSON, so they always parse
+        analysis_schema = _analysis_schema()
+        self._generation_config = genai_types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=analysis_schema
+        )
+        self._batch_generation_config = genai_types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=genai_types.Schema(type=genai_types.Type.ARRAY, items=analysis_schema)
+        )
     
     @property
     def model(self) -> str:
         return self._model
         
+    def _get_suggested_models(self) -> List[str]:
+        """Suggest up to five other Gemini models that support generateContent.
+        
+        The model list is fetched at most once per MODEL_LIST_TTL seconds,
+        so a batch run against a bad model name does not list models for
+        every photo.
+        """
+        cache = GeminiPhotoAnalyzer._model_list_cache
+        if cache is not None and time.monotonic() - cache[0] < MODEL_LIST_TTL:
+            available_models = cache[1]
+        else:
+            try:
+                # Extract model IDs (remove 'models/' prefix) of generateContent models
+                available_models = sorted({
+                    m.name.replace('models/', '')
+                    for m in self.client.models.list()
+                    if _supports_generate(m)
+                })
+            except Exception as list_error:
+                # Cache the failure too, so it is not retried for every photo
+                logger.debug(f"Failed to list models: {list_error}")
+                available_models = []
+            GeminiPhotoAnalyzer._model_list_cache = (time.monotonic(), available_models)
+        
+        # Leave out the current failed model
+        suggested = [model_id for model_id in available_models if model_id != self.model][:5]
+        return suggested or list(DEFAULT_SUGGESTED_MODELS)
+    
     def analyze_photo(self, image_path: str, prompt: Optional[str] = None, language: Language = Language.AUTO) -> AnalysisResult:
         """Analyze a single photo with Gemini."""
         logger.info(f"Analyzing photo: {image_path} with language: {language}")
         
-        # Load and preprocess image
-        image_data = self._load_and_preprocess_image(image_path)
+        # Load the image as an encoded part
+        image_data = self._load_image_part(image_path)
         
         # Get appropriate prompt based on language if no custom prompt provided
         if prompt is None:
             prompt = get_prompt_for_language(language)
         
         try:
+            # Wait for a rate-limit slot before the request, not after it
+            self.rate_limiter.acquire_sync()
+            
             # Call Gemini API with the new library
             response = self.client.models.generate_content(
                 model=self.model,
-                contents=[prompt, image_data]
+                contents=[_prompt_part(prompt), image_data],
+                config=self._generation_config
             )
             
             # Parse response
@@ -127,41 +207,18 @@ class GeminiPhotoAnalyzer(PhotoAnalyzer):
                 raise ValueError(f"Gemini API returned empty response for {image_path}")
             result = self._parse_response(response_text, image_path)
             
-            # Rate limiting for free tier
-            time.sleep(self._rate_limit_delay)
+            self.rate_limiter.adjust_delay_sync(success=True)
             
             return result
             
         except Exception as e:
             logger.error(f"Gemini API error for {image_path}: {e}")
+            self.rate_limiter.adjust_delay_sync(success=False, rate_limited=is_rate_limit_error(e))
             
             # Provide more helpful error message for model not found
             error_msg = str(e)
             if "404" in error_msg or "not found" in error_msg.lower() or "not supported" in error_msg.lower():
-                # Try to get list of available models
-                try:
-                    models = self.client.models.list()
-                    # Extract model IDs (remove 'models/' prefix) and filter for generateContent support
-                    available_models = []
-                    for m in models:
-                        # Simple check: include models with 'gemini' in name and not embedding
-                        if hasattr(m, 'name') and m.name:
-                            model_name = m.name
-                            if 'gemini' in model_name.lower() and 'embedding' not in model_name.lower():
-                                model_id = model_name.replace('models/', '')
-                                available_models.append(model_id)
-                    
-                    # Remove duplicates and the current failed model
-                    available_models = list(set(available_models))
-                    if self.model in available_models:
-                        available_models.remove(self.model)
-                    
-                    # Sort to put more recent/better models first
-                    available_models.sort()
-                    suggested = available_models[:5] if available_models else ["gemini-2.0-flash-exp", "gemini-flash-latest", "gemini-2.5-flash"]
-                except Exception as list_error:
-                    logger.debug(f"Failed to list models: {list_error}")
-                    suggested = ["gemini-2.0-flash-exp", "gemini-flash-latest", "gemini-2.5-flash"]
+                suggested = self._get_suggested_models()
                 
                 raise ValueError(
                     f"Model '{self.model}' not found or not supported. "
@@ -175,19 +232,23 @@ class GeminiPhotoAnalyzer(PhotoAnalyzer):
         """Asynchronously analyze a single photo with Gemini."""
         logger.info(f"Analyzing photo asynchronously: {image_path} with language: {language}")
         
-        # Load and preprocess image
-        image_data = self._load_and_preprocess_image(image_path)
+        # Load the image as an encoded part in a worker thread
+        image_data = await self._run_in_io_pool(self._load_image_part, image_path)
         
         # Get appropriate prompt based on language if no custom prompt provided
         if prompt is None:
             prompt = get_prompt_for_language(language)
         
         try:
-            # Call Gemini API (currently synchronous, but we wrap it for future async support)
-            # Note: google.genai doesn't have async API yet, but we keep the interface
-            response = self.client.models.generate_content(
+            # Adaptive rate limiting: wait for a slot before the request
+            await self.rate_limiter.acquire()
+            
+            # Call Gemini API through the async client so other requests
+            # proceed while this one is in flight
+            response = await self.client.aio.models.generate_content(
                 model=self.model,
-                contents=[prompt, image_data]
+                contents=[_prompt_part(prompt), image_data],
+                config=self._generation_config
             )
             
             # Parse response
@@ -196,8 +257,6 @@ class GeminiPhotoAnalyzer(PhotoAnalyzer):
                 raise ValueError(f"Gemini API returned empty response for {image_path}")
             result = self._parse_response(response_text, image_path)
             
-            # Adaptive rate limiting
-            await self.rate_limiter.wait()
             await self.rate_limiter.adjust_delay(success=True)
             
             return result
@@ -206,30 +265,13 @@ class GeminiPhotoAnalyzer(PhotoAnalyzer):
             logger.error(f"Gemini API async error for {image_path}: {e}")
             
             # Update rate limiter on error
-            await self.rate_limiter.adjust_delay(success=False)
+            await self.rate_limiter.adjust_delay(success=False, rate_limited=is_rate_limit_error(e))
             
             # Provide more helpful error message for model not found
             error_msg = str(e)
             if "404" in error_msg or "not found" in error_msg.lower() or "not supported" in error_msg.lower():
-                try:
-                    models = self.client.models.list()
-                    available_models = []
-                    for m in models:
-                        if hasattr(m, 'name') and m.name:
-                            model_name = m.name
-                            if 'gemini' in model_name.lower():
-                                model_id = model_name.replace('models/', '')
-                                if 'embedding' not in model_id.lower():
-                                    available_models.append(model_id)
-                    
-                    available_models = list(set(available_models))
-                    if self.model in available_models:
-                        available_models.remove(self.model)
-                    
-                    available_models.sort()
-                    suggested = available_models[:5] if available_models else ["gemini-2.0-flash-exp", "gemini-flash-latest", "gemini-2.5-flash"]
-                except Exception:
-                    suggested = ["gemini-2.0-flash-exp", "gemini-flash-latest", "gemini-2.5-flash"]
+                # Listing models is a blocking network call
+                suggested = await self._run_in_io_pool(self._get_suggested_models)
                 
                 raise ValueError(
                     f"Model '{self.model}' not found or not supported. "
@@ -237,96 +279,171 @@ class GeminiPhotoAnalyzer(PhotoAnalyzer):
                 )
             raise
     
+    def analyze_photos(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
+        """Analyze several photos with a single multi-image Gemini request."""
+        if len(image_paths) == 1:
+            return [self.analyze_photo(image_paths[0], prompt, language)]
+        logger.info(f"Analyzing {len(image_paths)} photos in one request with language: {language}")
+        
+        # All images travel in one request after a single prompt
+        images = [self._load_image_part(image_path) for image_path in image_paths]
+        if prompt is None:
+            prompt = get_prompt_for_language(language)
+        batch_prompt = get_multi_image_prompt(prompt, len(image_paths), language)
+        
+        try:
+            self.rate_limiter.acquire_sync()
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=[_prompt_part(batch_prompt), *images],
+                config=self._batch_generation_config
+            )
+            
+            response_text = response.text
+            if response_text is None:
+                raise ValueError(f"Gemini API returned empty response for {len(image_paths)} photos")
+            results = self._parse_batch_response(response_text, image_paths)
+            
+            self.rate_limiter.adjust_delay_sync(success=True)
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Gemini API error for {len(image_paths)} photos: {e}")
+            self.rate_limiter.adjust_delay_sync(success=False, rate_limited=is_rate_limit_error(e))
+            raise
+    
+    async def analyze_photos_async(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
+        """Asynchronously analyze several photos with a single multi-image Gemini request."""
+        if len(image_paths) == 1:
+            return [await self.analyze_photo_async(image_paths[0], prompt, language)]
+        logger.info(f"Analyzing {len(image_paths)} photos asynchronously in one request with language: {language}")
+        
+        # Load the images in parallel worker threads
+        images = await asyncio.gather(
+            *(self._run_in_io_pool(self._load_image_part, image_path) for image_path in image_paths)
+        )
+        if prompt is None:
+            prompt = get_prompt_for_language(language)
+        batch_prompt = get_multi_image_prompt(prompt, len(image_paths), language)
+        
+        try:
+            await self.rate_limiter.acquire()
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=[_prompt_part(batch_prompt), *images],
+                config=self._batch_generation_config
+            )
+            
+            response_text = response.text
+            if response_text is None:
+                raise ValueError(f"Gemini API returned empty response for {len(image_paths)} photos")
+            results = self._parse_batch_response(response_text, image_paths)
+            
+            await self.rate_limiter.adjust_delay(success=True)
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Gemini API async error for {len(image_paths)} photos: {e}")
+            await self.rate_limiter.adjust_delay(success=False, rate_limited=is_rate_limit_error(e))
+            raise
+    
     def batch_analyze(
         self, 
         image_paths: List[str], 
         prompt: Optional[str] = None,
         language: Language = Language.AUTO
     ) -> List[AnalysisResult]:
-        """Analyze multiple photos with rate limiting."""
-        results = []
-        for i, image_path in enumerate(image_paths):
-            try:
-                result = self.analyze_photo(image_path, prompt, language)
-                results.append(result)
-                logger.info(f"Completed {i+1}/{len(image_paths)}: {image_path}")
-            except Exception as e:
-                logger.error(f"Failed to analyze {image_path}: {e}")
-                # Continue with next photo
-                continue
+        """Analyze multiple photos concurrently, bounded by the concurrency limit.
+        
+        Runs batch_analyze_async on its own event loop, so it must not be
+        called from a running loop. Photos that fail are logged and skipped;
+        results keep the order of image_paths.
+        """
+        results = asyncio.run(self.batch_analyze_async(
+            image_paths,
+            prompt,
+            language,
+            max_concurrent=self._max_concurrent,
+            batch_size=self._batch_size
+        ))
+        logger.info(f"Completed {len(results)}/{len(image_paths)} photos")
         return results
     
+    def _load_image_part(self, image_path: str) -> Any:
+        """Load an image as an inline Gemini content part."""
+        data, mime_type = self._load_image_bytes(image_path)
+        return genai_types.Part.from_bytes(data=data, mime_type=mime_type)
+    
+    def _load_image_bytes(self, image_path: str) -> Tuple[bytes, str]:
+        """Load an image as encoded bytes and their MIME type.
+        
+        Small images in a format Gemini accepts are read as-is; anything
+        else is decoded, resized and re-encoded once as JPEG.
+        """
+        # A single open serves the header check, the size check and the read;
+        # PIL only parses the header here, so this check is cheap
+        try:
+            with open(image_path, "rb") as f:
+                with Image.open(f) as img:
+                    mime_type = PASSTHROUGH_MIME_TYPES.get(img.format)
+                    fits = max(img.size) <= MAX_IMAGE_SIZE
+                if mime_type and fits and os.fstat(f.fileno()).st_size <= PASSTHROUGH_MAX_BYTES:
+                    f.seek(0)
+                    return f.read(), mime_type
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image not found: {image_path}") from None
+        except Exception as e:
+            raise ValueError(f"Failed to load image {image_path}: {e}")
+        
+        img = self._load_and_preprocess_image(image_path)
+        try:
+            rgb = img if img.mode == "RGB" else img.convert("RGB")
+            buffered = io.BytesIO()
+            rgb.save(buffered, format="JPEG", quality=85)
+            if rgb is not img:
+                rgb.close()
+        finally:
+            # Free the pixel buffer now rather than when the image is collected
+            img.close()
+        return buffered.getvalue(), "image/jpeg"
+    
     def _load_and_preprocess_image(self, image_path: str) -> Image.Image:
         """Load image and return PIL Image object."""
-        path = Path(image_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Image not found: {image_path}")
-        
-        # Open with PIL to validate and potentially resize
+        # Open with PIL to validate and potentially resize; a missing file
+        # surfaces from Image.open instead of a separate exists() check
         try:
             img = Image.open(image_path)
+            max_size = MAX_IMAGE_SIZE
+            # Let libjpeg decode large JPEGs at a reduced scale (1/2 to 1/8)
+            # rather than decoding every pixel and discarding most of them
+            if img.format == "JPEG" and max(img.size) > max_size:
+                ratio = max_size / max(img.size)
+                img.draft("RGB", (int(img.size[0] * ratio), int(img.size[1] * ratio)))
+            
             # Convert to RGB if necessary
             if img.mode in ("RGBA", "LA", "P"):
                 img = img.convert("RGB")
             
-            # Resize if too large (Gemini has limits)
-            max_size = 2048
+            # Resize if still too large (Gemini has limits); BILINEAR is antialiased
+            # on downscale like LANCZOS and about twice as fast
             if max(img.size) > max_size:
                 ratio = max_size / max(img.size)
                 new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+                img = img.resize(new_size, Image.Resampling.BILINEAR)
+            
+            # Decode now rather than lazily on first use, so async callers
+            # pay for it in the worker thread
+            img.load()
             
             # Return the image object
             return img
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image not found: {image_path}") from None
         except Exception as e:
             raise ValueError(f"Failed to load image {image_path}: {e}")
     
-    def _parse_response(self, response_text: str, image_path: str) -> AnalysisResult:
-        """Parse Gemini response into AnalysisResult."""
-        # Extract JSON from response (might have markdown code blocks)
-        
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if not json_match:
-            logger.warning(f"No JSON found in response for {image_path}")
-            # Fallback: use entire response as description
-            return AnalysisResult(
-                photo_path=image_path,
-                llm_model=self.model,
-                description=response_text.strip(),
-                people=[],
-                locations=[],
-                objects=[],
-                tags=[],
-                generated_at=datetime.now()
-            )
-        
-        try:
-            data = json.loads(json_match.group())
-            return AnalysisResult(
-                photo_path=image_path,
-                llm_model=self.model,
-                description=data.get("description", ""),
-                people=data.get("people", []),
-                locations=data.get("locations", []),
-                objects=data.get("objects", []),
-                tags=data.get("tags", []),
-                generated_at=datetime.now()
-            )
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response for {image_path}: {e}")
-            # Fallback
-            return AnalysisResult(
-                photo_path=image_path,
-                llm_model=self.model,
-                description=response_text.strip(),
-                people=[],
-                locations=[],
-                objects=[],
-                tags=[],
-                generated_at=datetime.now()
-            )
-    
     def set_rate_limit_delay(self, seconds: float):
         """Set delay between API calls (for rate limiting)."""
         self._rate_limit_delay = seconds
@@ -339,6 +456,10 @@ class GeminiPhotoAnalyzer(PhotoAnalyzer):
     def set_batch_size(self, batch_size: int) -> None:
         """Set batch size for processing."""
         self._batch_size = batch_size
+    
+    def set_images_per_request(self, images_per_request: int) -> None:
+        """Set how many photos are sent together in one API request."""
+        self._images_per_request = images_per_request
 
 
 # Convenience function
@@ -347,85 +468,91 @@ def create_analyzer(api_key: str) -> GeminiPhotoAnalyzer:
     return GeminiPhotoAnalyzer(api_key=api_key)
 
 
+# Canned mock analyses by filename, shared by all MockPhotoAnalyzer instances
+_MOCK_RESPONSES_EN: Dict[str, Dict[str, Any]] = {
+    "warm.jpeg": {
+        "description": "A warm and cozy indoor scene with soft lighting",
+        "people": ("person sitting", "family member"),
+        "locations": ("living room", "home", "indoors"),
+        "objects": ("sofa", "lamp", "book", "blanket"),
+        "tags": ("cozy", "warm", "home", "comfort", "relaxing")
+    },
+    "beach_sunset.jpg": {
+        "description": "A beautiful sunset at the beach with golden sand and orange sky",
+        "people": ("couple walking", "children playing"),
+        "locations": ("beach", "ocean", "shoreline"),
+        "objects": ("sun", "waves", "sand", "umbrella"),
+        "tags": ("sunset", "beach", "ocean", "evening", "vacation")
+    },
+    "mountain_hike.png": {
+        "description": "People hiking on a mountain trail with scenic views",
+        "people": ("hikers", "tourists"),
+        "locations": ("mountain", "trail", "forest"),
+        "objects": ("backpack", "trees", "rocks", "sky"),
+        "tags": ("hiking", "mountain", "nature", "outdoor", "adventure")
+    },
+    "birthday_party.jpeg": {
+        "description": "A birthday party celebration with cake and balloons",
+        "people": ("family", "friends", "children"),
+        "locations": ("living room", "indoors", "home"),
+        "objects": ("cake", "balloons", "candles", "gifts"),
+        "tags": ("birthday", "party", "celebration", "family", "cake")
+    },
+    "office_work.jpg": {
+        "description": "People working in a modern office environment",
+        "people": ("office workers", "colleagues"),
+        "locations": ("office", "workspace", "indoors"),
+        "objects": ("computer", "desk", "chair", "monitor"),
+        "tags": ("office", "work", "business", "computer", "professional")
+    }
+}
+
+_MOCK_RESPONSES_ZH: Dict[str, Dict[str, Any]] = {
+    "warm.jpeg": {
+        "description": "温暖舒适的室内场景，光线柔和",
+        "people": ("坐着的人", "家庭成员"),
+        "locations": ("客厅", "家", "室内"),
+        "objects": ("沙发", "台灯", "书", "毯子"),
+        "tags": ("舒适", "温暖", "家", "放松", "温馨")
+    },
+    "beach_sunset.jpg": {
+        "description": "海滩上美丽的日落，金色沙滩和橙色的天空",
+        "people": ("散步的情侣", "玩耍的孩子们"),
+        "locations": ("海滩", "海洋", "海岸线"),
+        "objects": ("太阳", "波浪", "沙子", "遮阳伞"),
+        "tags": ("日落", "海滩", "海洋", "傍晚", "假期")
+    },
+    "mountain_hike.png": {
+        "description": "人们在山间小径上徒步，风景优美",
+        "people": ("徒步者", "游客"),
+        "locations": ("山脉", "小径", "森林"),
+        "objects": ("背包", "树木", "岩石", "天空"),
+        "tags": ("徒步", "山脉", "自然", "户外", "冒险")
+    },
+    "birthday_party.jpeg": {
+        "description": "生日派对庆祝，有蛋糕和气球",
+        "people": ("家人", "朋友", "孩子们"),
+        "locations": ("客厅", "室内", "家"),
+        "objects": ("蛋糕", "气球", "蜡烛", "礼物"),
+        "tags": ("生日", "派对", "庆祝", "家庭", "蛋糕")
+    },
+    "office_work.jpg": {
+        "description": "人们在现代办公室环境中工作",
+        "people": ("办公室职员", "同事"),
+        "locations": ("办公室", "工作区", "室内"),
+        "objects": ("电脑", "桌子", "椅子", "显示器"),
+        "tags": ("办公室", "工作", "商务", "电脑", "专业")
+    }
+}
+
+_MOCK_RESPONSES_BY_LANGUAGE = {Language.EN: _MOCK_RESPONSES_EN, Language.ZH: _MOCK_RESPONSES_ZH}
+
+
 class MockPhotoAnalyzer(PhotoAnalyzer):
     """Mock analyzer for testing without real API calls."""
     
     def __init__(self, model: str = "mock-gemini"):
         self._model = model
-        self._mock_responses_en = {
-            "warm.jpeg": {
-                "description": "A warm and cozy indoor scene with soft lighting",
-                "people": ["person sitting", "family member"],
-                "locations": ["living room", "home", "indoors"],
-                "objects": ["sofa", "lamp", "book", "blanket"],
-                "tags": ["cozy", "warm", "home", "comfort", "relaxing"]
-            },
-            "beach_sunset.jpg": {
-                "description": "A beautiful sunset at the beach with golden sand and orange sky",
-                "people": ["couple walking", "children playing"],
-                "locations": ["beach", "ocean", "shoreline"],
-                "objects": ["sun", "waves", "sand", "umbrella"],
-                "tags": ["sunset", "beach", "ocean", "evening", "vacation"]
-            },
-            "mountain_hike.png": {
-                "description": "People hiking on a mountain trail with scenic views",
-                "people": ["hikers", "tourists"],
-                "locations": ["mountain", "trail", "forest"],
-                "objects": ["backpack", "trees", "rocks", "sky"],
-                "tags": ["hiking", "mountain", "nature", "outdoor", "adventure"]
-            },
-            "birthday_party.jpeg": {
-                "description": "A birthday party celebration with cake and balloons",
-                "people": ["family", "friends", "children"],
-                "locations": ["living room", "indoors", "home"],
-                "objects": ["cake", "balloons", "candles", "gifts"],
-                "tags": ["birthday", "party", "celebration", "family", "cake"]
-            },
-            "office_work.jpg": {
-                "description": "People working in a modern office environment",
-                "people": ["office workers", "colleagues"],
-                "locations": ["office", "workspace", "indoors"],
-                "objects": ["computer", "desk", "chair", "monitor"],
-                "tags": ["office", "work", "business", "computer", "professional"]
-            }
-        }
-        self._mock_responses_zh = {
-            "warm.jpeg": {
-                "description": "温暖舒适的室内场景，光线柔和",
-                "people": ["坐着的人", "家庭成员"],
-                "locations": ["客厅", "家", "室内"],
-                "objects": ["沙发", "台灯", "书", "毯子"],
-                "tags": ["舒适", "温暖", "家", "放松", "温馨"]
-            },
-            "beach_sunset.jpg": {
-                "description": "海滩上美丽的日落，金色沙滩和橙色的天空",
-                "people": ["散步的情侣", "玩耍的孩子们"],
-                "locations": ["海滩", "海洋", "海岸线"],
-                "objects": ["太阳", "波浪", "沙子", "遮阳伞"],
-                "tags": ["日落", "海滩", "海洋", "傍晚", "假期"]
-            },
-            "mountain_hike.png": {
-                "description": "人们在山间小径上徒步，风景优美",
-                "people": ["徒步者", "游客"],
-                "locations": ["山脉", "小径", "森林"],
-                "objects": ["背包", "树木", "岩石", "天空"],
-                "tags": ["徒步", "山脉", "自然", "户外", "冒险"]
-            },
-            "birthday_party.jpeg": {
-                "description": "生日派对庆祝，有蛋糕和气球",
-                "people": ["家人", "朋友", "孩子们"],
-                "locations": ["客厅", "室内", "家"],
-                "objects": ["蛋糕", "气球", "蜡烛", "礼物"],
-                "tags": ["生日", "派对", "庆祝", "家庭", "蛋糕"]
-            },
-            "office_work.jpg": {
-                "description": "人们在现代办公室环境中工作",
-                "people": ["办公室职员", "同事"],
-                "locations": ["办公室", "工作区", "室内"],
-                "objects": ["电脑", "桌子", "椅子", "显示器"],
-                "tags": ["办公室", "工作", "商务", "电脑", "专业"]
-            }
-        }
     
     @property
     def model(self) -> str:
@@ -433,14 +560,14 @@ class MockPhotoAnalyzer(PhotoAnalyzer):
     
     def analyze_photo(self, image_path: str, prompt: Optional[str] = None, language: Language = Language.AUTO) -> AnalysisResult:
         """Mock analysis based on filename."""
+        return self._mock_result(image_path, resolve_language(language), datetime.now())
+    
+    def _mock_result(self, image_path: str, resolved_language: Language, generated_at: datetime) -> AnalysisResult:
+        """Build the canned result for a photo in an already resolved language."""
         filename = Path(image_path).name
         
         # Choose response dictionary based on language
-        resolved_language = resolve_language(language)
-        if resolved_language == Language.ZH:
-            responses = self._mock_responses_zh
-        else:
-            responses = self._mock_responses_en
+        responses = _MOCK_RESPONSES_BY_LANGUAGE.get(resolved_language, _MOCK_RESPONSES_EN)
         
         if filename in responses:
             data = responses[filename]
@@ -463,20 +590,24 @@ class MockPhotoAnalyzer(PhotoAnalyzer):
                     "tags": ["photo", "image"]
                 }
         
+        # Copy the shared constants so callers can modify their results
         return AnalysisResult(
             photo_path=image_path,
             llm_model=self.model,
             description=data["description"],
-            people=data["people"],
-            locations=data["locations"],
-            objects=data["objects"],
-            tags=data["tags"],
-            generated_at=datetime.now()
+            people=list(data["people"]),
+            locations=list(data["locations"]),
+            objects=list(data["objects"]),
+            tags=list(data["tags"]),
+            generated_at=generated_at
         )
     
     def batch_analyze(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
         """Mock batch analysis."""
-        return [self.analyze_photo(path, prompt, language) for path in image_paths]
+        resolved_language = resolve_language(language)
+        # The whole mock batch is "generated" at the same moment
+        generated_at = datetime.now()
+        return [self._mock_result(path, resolved_language, generated_at) for path in image_paths]
     
     def set_rate_limit_delay(self, seconds: float):
         """Mock method for compatibility."""
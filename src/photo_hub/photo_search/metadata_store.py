@@ -3,28 +3,207 @@
 import asyncio
 import json
 import logging
+import os
+import threading
+import zlib
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Set
 import sqlite3
 
-from photo_hub.photo_search.models import PhotoMetadata, AnalysisResult
+from photo_hub.photo_search.models import PhotoMetadata, AnalysisResult, compute_content_hash
 
 logger = logging.getLogger(__name__)
 
+# JSON columns go through orjson when it is installed. Both variants keep
+# non-ASCII text as-is, so translated tags stay searchable, and stringify
+# values JSON cannot hold, such as the byte strings and rationals in EXIF
+try:
+    import orjson
+    
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str).decode()
+    
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, default=str)
+    
+    _json_loads = json.loads
+
+# EXIF JSON at least this long is stored zlib-compressed as a BLOB; maker
+# notes and other byte strings make it large and repetitive, while short
+# EXIF would barely shrink and stays plain TEXT
+EXIF_COMPRESS_MIN_BYTES = 256
+
+
+def _exif_dumps(exif_data: Dict[str, Any]):
+    """Serialize EXIF for the exif_data column, compressing it when large."""
+    text = _json_dumps(exif_data)
+    data = text.encode()
+    if len(data) < EXIF_COMPRESS_MIN_BYTES:
+        return text
+    return zlib.compress(data)
+
+
+def _exif_loads(value) -> Dict[str, Any]:
+    """Inverse of _exif_dumps; also reads uncompressed TEXT."""
+    if not value:
+        return {}
+    if isinstance(value, bytes):
+        value = zlib.decompress(value)
+    return _json_loads(value)
+
+# Stay below SQLite's default limit of 999 bound parameters per statement
+SQLITE_MAX_PARAMS_CHUNK = 900
+
+# Rows written per transaction by the batch writers; bounds the memory held
+# for one commit and how far the WAL grows before it can be checkpointed
+MAX_ROWS_PER_TRANSACTION = 500
+
+# Prepared statements kept per connection by the sqlite3 module
+STATEMENT_CACHE_SIZE = 256
+
+# The FTS5 trigram tokenizer can only answer substring queries of 3+ characters
+FTS_MIN_QUERY_LENGTH = 3
+
+# Searchable analysis columns, mirrored into the analysis_fts index
+_FTS_COLUMNS = "description, people, locations, objects, tags"
+
+# Photo columns returned by search_photos; EXIF is left out since results
+# never show it and it can be large (maker notes, embedded thumbnails)
+_SEARCH_PHOTO_COLUMNS = ", ".join(
+    f"p.{column}" for column in (
+        "id", "path", "filename", "size", "created_time", "modified_time",
+        "image_width", "image_height", "format", "file_hash", "scanned_at", "content_hash",
+    )
+)
+
+# Schema version kept in PRAGMA user_version; 1 stores timestamps as
+# INTEGER microseconds since the epoch instead of ISO text, 2 drops indexes
+# that duplicate the UNIQUE constraints' own, 3 compresses large EXIF
+SCHEMA_VERSION = 3
+
+# RETURNING (SQLite 3.35+) hands back the upserted row's id without a
+# second lookup
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Insert a photo or refresh the row already stored for its path; rows of
+# unchanged files (same size, mtime and known content hash) are not
+# rewritten, so rescanning a static library writes nothing
+_UPSERT_PHOTO_SQL = """
+    INSERT INTO photos (
+        path, filename, size, created_time, modified_time,
+        image_width, image_height, format, exif_data, file_hash,
+        content_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+        filename = excluded.filename,
+        size = excluded.size,
+        created_time = excluded.created_time,
+        modified_time = excluded.modified_time,
+        image_width = excluded.image_width,
+        image_height = excluded.image_height,
+        format = excluded.format,
+        exif_data = excluded.exif_data,
+        content_hash = COALESCE(excluded.content_hash, content_hash),
+        scanned_at = CURRENT_TIMESTAMP
+    WHERE size IS NOT excluded.size
+        OR modified_time IS NOT excluded.modified_time
+        OR content_hash IS NOT COALESCE(excluded.content_hash, content_hash)
+"""
+
+# Insert an analysis or update the one the model already made of the photo;
+# updating in place keeps the row id (and its full-text index entry) stable
+_UPSERT_ANALYSIS_SQL = """
+    INSERT INTO analysis_results (
+        photo_id, llm_model, description,
+        people, locations, objects, tags, generated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(photo_id, llm_model) DO UPDATE SET
+        description = excluded.description,
+        people = excluded.people,
+        locations = excluded.locations,
+        objects = excluded.objects,
+        tags = excluded.tags,
+        generated_at = excluded.generated_at
+"""
+
+
+def _to_epoch_us(value: datetime) -> int:
+    """Convert a datetime to the integer microseconds stored in timestamp columns."""
+    return int(value.replace(microsecond=0).timestamp()) * 1_000_000 + value.microsecond
+
+
+def _from_epoch_us(value: int) -> datetime:
+    """Convert a stored timestamp back to a naive local datetime."""
+    seconds, microseconds = divmod(value, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microseconds)
+
+
+def _iso_to_epoch_us(value: Any) -> Any:
+    """SQL function migrating ISO text timestamps; other values pass through."""
+    if isinstance(value, str):
+        return _to_epoch_us(datetime.fromisoformat(value))
+    return value
+
 
 class MetadataStore:
     """SQLite-based storage for photo metadata and analysis results."""
     
     def __init__(self, db_path: str = "photo_search.db"):
         self.db_path = db_path
+        # One connection per thread, kept open between calls: sqlite3
+        # connections may not be shared across threads
+        self._local = threading.local()
+        # Reads metadata of photos being saved, created on first use
+        self._scanner = None
         self._init_db()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, tuned for bulk writes.
+        
+        The connection is opened on first use and reused afterwards, so
+        calls don't pay for reopening the database and its WAL files.
+        Use it as a context manager to commit or roll back.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        
+        # Chunked IN (...) lookups produce a statement per chunk length, so
+        # keep more prepared statements than the default 128 to avoid
+        # evicting the hot upsert and lookup statements
+        conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+        # WAL (set in _init_db) stays consistent with NORMAL sync and avoids
+        # an fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # 64 MiB page cache and memory-mapped reads for search and stats
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        # Truncate the WAL back to 64 MiB after checkpoints instead of
+        # leaving it at its high-water mark after a large scan
+        conn.execute("PRAGMA journal_size_limit=67108864")
+        self._local.conn = conn
+        return conn
+    
+    def close(self) -> None:
+        """Close the calling thread's connection, if it has one."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
     def _init_db(self):
         """Initialize database tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
+            # Write-ahead logging is persistent, so it only needs setting once
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # Photos table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS photos (
@@ -32,8 +211,8 @@ class MetadataStore:
                     path TEXT UNIQUE NOT NULL,
                     filename TEXT NOT NULL,
                     size INTEGER NOT NULL,
-                    created_time TIMESTAMP NOT NULL,
-                    modified_time TIMESTAMP NOT NULL,
+                    created_time INTEGER NOT NULL,
+                    modified_time INTEGER NOT NULL,
                     image_width INTEGER,
                     image_height INTEGER,
                     format TEXT,
@@ -54,144 +233,263 @@ class MetadataStore:
                     locations TEXT,  -- JSON array
                     objects TEXT,  -- JSON array
                     tags TEXT,  -- JSON array
-                    generated_at TIMESTAMP NOT NULL,
+                    generated_at INTEGER NOT NULL,
                     FOREIGN KEY (photo_id) REFERENCES photos (id) ON DELETE CASCADE,
                     UNIQUE(photo_id, llm_model)
                 )
             """)
             
-            # Create indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_path ON photos(path)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_hash ON photos(file_hash)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_analysis_photo ON analysis_results(photo_id)")
+            # Lookups by path and by photo_id use the indexes behind the
+            # UNIQUE constraints; this one serves the ORDER BY of search_photos
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_modified ON photos(modified_time DESC)")
+            
+            # Content hashes were added later; migrate older databases in place
+            cursor.execute("PRAGMA table_info(photos)")
+            if "content_hash" not in {row[1] for row in cursor}:
+                cursor.execute("ALTER TABLE photos ADD COLUMN content_hash TEXT")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_content_hash ON photos(content_hash)")
+            
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
+            if version < 1:
+                self._migrate_timestamps(conn)
+            if version < 2:
+                for index in ("idx_photos_path", "idx_photos_hash", "idx_analysis_photo"):
+                    cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            if version < 3:
+                conn.create_function("compress_exif", 1, lambda text: zlib.compress(text.encode()), deterministic=True)
+                cursor.execute(
+                    "UPDATE photos SET exif_data = compress_exif(exif_data) "
+                    "WHERE typeof(exif_data) = 'text' AND length(CAST(exif_data AS BLOB)) >= ?",
+                    (EXIF_COMPRESS_MIN_BYTES,)
+                )
+            if version < SCHEMA_VERSION:
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            
+            self._fts_enabled = self._init_fts(cursor)
             
             conn.commit()
     
+    def _migrate_timestamps(self, conn: sqlite3.Connection) -> None:
+        """Convert ISO text timestamps written by older versions to epoch microseconds."""
+        conn.create_function("iso_to_epoch_us", 1, _iso_to_epoch_us, deterministic=True)
+        conn.execute("""
+            UPDATE photos SET
+                created_time = iso_to_epoch_us(created_time),
+                modified_time = iso_to_epoch_us(modified_time)
+            WHERE typeof(created_time) = 'text' OR typeof(modified_time) = 'text'
+        """)
+        conn.execute("""
+            UPDATE analysis_results SET generated_at = iso_to_epoch_us(generated_at)
+            WHERE typeof(generated_at) = 'text'
+        """)
+    
+    def _init_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """Create the full-text index over analysis results, if SQLite supports it.
+        
+        The index uses the trigram tokenizer so it answers the same substring
+        queries as LIKE '%query%'. Returns False when FTS5 or the trigram
+        tokenizer (SQLite 3.34+) is unavailable.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'analysis_fts'")
+        if cursor.fetchone():
+            return True
+        
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE analysis_fts USING fts5(
+                    {_FTS_COLUMNS},
+                    content='analysis_results', content_rowid='id', tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.info(f"Full-text search unavailable, falling back to LIKE: {e}")
+            return False
+        
+        # Keep the index in sync with analysis_results
+        new_values = "new.id, new.description, new.people, new.locations, new.objects, new.tags"
+        old_values = "old.id, old.description, old.people, old.locations, old.objects, old.tags"
+        cursor.executescript(f"""
+            CREATE TRIGGER analysis_fts_ai AFTER INSERT ON analysis_results BEGIN
+                INSERT INTO analysis_fts(rowid, {_FTS_COLUMNS}) VALUES ({new_values});
+            END;
+            CREATE TRIGGER analysis_fts_ad AFTER DELETE ON analysis_results BEGIN
+                INSERT INTO analysis_fts(analysis_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {old_values});
+            END;
+            CREATE TRIGGER analysis_fts_au AFTER UPDATE ON analysis_results BEGIN
+                INSERT INTO analysis_fts(analysis_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {old_values});
+                INSERT INTO analysis_fts(rowid, {_FTS_COLUMNS}) VALUES ({new_values});
+            END;
+        """)
+        
+        # Index results saved before the index existed
+        cursor.execute("INSERT INTO analysis_fts(analysis_fts) VALUES ('rebuild')")
+        return True
+    
     def save_photo_metadata(self, metadata: PhotoMetadata) -> int:
         """Save photo metadata, return photo ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Check if photo already exists
-            cursor.execute(
-                "SELECT id FROM photos WHERE path = ? OR file_hash = ?",
-                (metadata.path, metadata.file_hash)
-            )
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing record
-                cursor.execute("""
-                    UPDATE photos SET
-                        filename = ?,
-                        size = ?,
-                        created_time = ?,
-                        modified_time = ?,
-                        image_width = ?,
-                        image_height = ?,
-                        format = ?,
-                        exif_data = ?,
-                        scanned_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (
-                    metadata.filename,
-                    metadata.size,
-                    metadata.created_time.isoformat(),
-                    metadata.modified_time.isoformat(),
-                    metadata.image_width,
-                    metadata.image_height,
-                    metadata.format,
-                    json.dumps(metadata.exif_data),
-                    existing[0]
-                ))
-                return existing[0]
-            else:
-                # Insert new record
-                cursor.execute("""
-                    INSERT INTO photos (
-                        path, filename, size, created_time, modified_time,
-                        image_width, image_height, format, exif_data, file_hash
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    metadata.path,
-                    metadata.filename,
-                    metadata.size,
-                    metadata.created_time.isoformat(),
-                    metadata.modified_time.isoformat(),
-                    metadata.image_width,
-                    metadata.image_height,
-                    metadata.format,
-                    json.dumps(metadata.exif_data),
-                    metadata.file_hash,
-                ))
-                lastrowid = cursor.lastrowid
-                if lastrowid is None:
-                    raise ValueError("Failed to get last insert ID")
-                return lastrowid
+        with self._connect() as conn:
+            return self._upsert_photo(conn.cursor(), metadata)
+    
+    def save_photo_metadata_bulk(self, metadata_list: List[PhotoMetadata]) -> List[int]:
+        """Save metadata of many photos, return their IDs in the same order.
+        
+        Rows are upserted with executemany, one transaction per
+        MAX_ROWS_PER_TRANSACTION photos, and their IDs are read back with a
+        single query per transaction.
+        """
+        photo_ids: List[int] = []
+        conn = self._connect()
+        for i in range(0, len(metadata_list), MAX_ROWS_PER_TRANSACTION):
+            chunk = metadata_list[i:i + MAX_ROWS_PER_TRANSACTION]
+            with conn:
+                cursor = conn.cursor()
+                # Upsert by path so photo ids (and their analyses) survive
+                cursor.executemany(_UPSERT_PHOTO_SQL, [self._photo_row(metadata) for metadata in chunk])
+                
+                paths = list(dict.fromkeys(metadata.path for metadata in chunk))
+                placeholders = ",".join("?" * len(paths))
+                cursor.execute(f"SELECT path, id FROM photos WHERE path IN ({placeholders})", paths)
+                ids_by_path = dict(cursor.fetchall())
+            photo_ids.extend(ids_by_path[metadata.path] for metadata in chunk)
+        return photo_ids
+    
+    def _upsert_photo(self, cursor: sqlite3.Cursor, metadata: PhotoMetadata) -> int:
+        """Insert or update a photo row using an open cursor, return photo ID."""
+        params = self._photo_row(metadata)
+        if _SQLITE_HAS_RETURNING:
+            cursor.execute(_UPSERT_PHOTO_SQL + " RETURNING id", params)
+            row = cursor.fetchone()
+            if row is not None:
+                return row[0]
+        else:
+            cursor.execute(_UPSERT_PHOTO_SQL, params)
+        # No row comes back when the stored photo was left unchanged
+        cursor.execute("SELECT id FROM photos WHERE path = ?", (metadata.path,))
+        return cursor.fetchone()[0]
+    
+    @staticmethod
+    def _photo_row(metadata: PhotoMetadata) -> tuple:
+        """Parameters for _UPSERT_PHOTO_SQL."""
+        return (
+            metadata.path,
+            metadata.filename,
+            metadata.size,
+            _to_epoch_us(metadata.created_time),
+            _to_epoch_us(metadata.modified_time),
+            metadata.image_width,
+            metadata.image_height,
+            metadata.format,
+            _exif_dumps(metadata.exif_data),
+            metadata.file_hash,
+            metadata.content_hash,
+        )
     
     def save_analysis_result(self, result: AnalysisResult) -> int:
         """Save analysis result, return result ID."""
-        # First ensure photo exists
-        photo_id = self.save_photo_metadata_from_path(result.photo_path)
-        
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
-            
-            # Check if analysis already exists for this photo and model
+            # First ensure photo exists
+            photo_id = self._photo_ids(cursor, [result])[result.photo_path]
+            params = self._analysis_row(photo_id, result)
+            if _SQLITE_HAS_RETURNING:
+                cursor.execute(_UPSERT_ANALYSIS_SQL + " RETURNING id", params)
+            else:
+                cursor.execute(_UPSERT_ANALYSIS_SQL, params)
+                cursor.execute(
+                    "SELECT id FROM analysis_results WHERE photo_id = ? AND llm_model = ?",
+                    (photo_id, result.llm_model)
+                )
+            return cursor.fetchone()[0]
+    
+    @staticmethod
+    def _analysis_row(photo_id: int, result: AnalysisResult) -> tuple:
+        """Parameters for _UPSERT_ANALYSIS_SQL."""
+        return (
+            photo_id,
+            result.llm_model,
+            result.description,
+            _json_dumps(result.people),
+            _json_dumps(result.locations),
+            _json_dumps(result.objects),
+            _json_dumps(result.tags),
+            _to_epoch_us(result.generated_at),
+        )
+    
+    def save_analysis_results_batch(self, results: List[AnalysisResult]) -> None:
+        """Save several analysis results, one transaction per MAX_ROWS_PER_TRANSACTION."""
+        conn = self._connect()
+        for i in range(0, len(results), MAX_ROWS_PER_TRANSACTION):
+            chunk = results[i:i + MAX_ROWS_PER_TRANSACTION]
+            with conn:
+                cursor = conn.cursor()
+                
+                # Photo rows and analysis rows share one transaction (one commit)
+                photo_ids = self._photo_ids(cursor, chunk)
+                batch_data = [self._analysis_row(photo_ids[result.photo_path], result) for result in chunk]
+                cursor.executemany(_UPSERT_ANALYSIS_SQL, batch_data)
+    
+    def save_analysis_results_with_fallback(self, results: List[AnalysisResult]) -> int:
+        """Save results in batches, retrying one by one if a batch fails.
+        
+        A single bad result then loses only itself, not the whole batch.
+        
+        Returns:
+            Number of results that could not be saved
+        """
+        try:
+            self.save_analysis_results_batch(results)
+            return 0
+        except Exception as e:
+            logger.error(f"Failed to save {len(results)} analysis results as a batch, saving one by one: {e}")
+        
+        failures = 0
+        for result in results:
+            try:
+                self.save_analysis_result(result)
+            except Exception as e:
+                logger.error(f"Failed to save analysis result for {result.photo_path}: {e}")
+                failures += 1
+        return failures
+    
+    def _photo_ids(self, cursor: sqlite3.Cursor, results: List[AnalysisResult]) -> Dict[str, int]:
+        """Return the photo ID for each result's path, saving photos that are new or changed.
+        
+        Photos whose stored size and modification time still match the file
+        keep their row as is, so only new or changed files are opened, and
+        only those whose result carries no content hash are hashed.
+        
+        Raises:
+            ValueError: If metadata cannot be extracted from a new or changed file
+        """
+        photo_ids: Dict[str, int] = {}
+        content_hashes = {result.photo_path: result.content_hash for result in results}
+        unique_paths = list(content_hashes)
+        for i in range(0, len(unique_paths), SQLITE_MAX_PARAMS_CHUNK):
+            chunk = unique_paths[i:i + SQLITE_MAX_PARAMS_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
             cursor.execute(
-                "SELECT id FROM analysis_results WHERE photo_id = ? AND llm_model = ?",
-                (photo_id, result.llm_model)
+                f"SELECT path, id, size, modified_time FROM photos WHERE path IN ({placeholders})",
+                chunk
             )
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing analysis
-                cursor.execute("""
-                    UPDATE analysis_results SET
-                        description = ?,
-                        people = ?,
-                        locations = ?,
-                        objects = ?,
-                        tags = ?,
-                        generated_at = ?
-                    WHERE id = ?
-                """, (
-                    result.description,
-                    json.dumps(result.people),
-                    json.dumps(result.locations),
-                    json.dumps(result.objects),
-                    json.dumps(result.tags),
-                    result.generated_at.isoformat(),
-                    existing[0]
-                ))
-                return existing[0]
-            else:
-                # Insert new analysis
-                cursor.execute("""
-                    INSERT INTO analysis_results (
-                        photo_id, llm_model, description,
-                        people, locations, objects, tags, generated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    photo_id,
-                    result.llm_model,
-                    result.description,
-                    json.dumps(result.people),
-                    json.dumps(result.locations),
-                    json.dumps(result.objects),
-                    json.dumps(result.tags),
-                    result.generated_at.isoformat(),
-                ))
-                lastrowid = cursor.lastrowid
-                if lastrowid is None:
-                    raise ValueError("Failed to get last insert ID")
-                return lastrowid
+            for path, photo_id, size, modified_time in cursor.fetchall():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_size == size and _to_epoch_us(datetime.fromtimestamp(stat.st_mtime)) == modified_time:
+                    photo_ids[path] = photo_id
+        
+        for path in unique_paths:
+            if path not in photo_ids:
+                photo_ids[path] = self._upsert_photo(cursor, self._metadata_from_path(path, content_hashes[path]))
+        return photo_ids
     
     async def save_analysis_result_batch(self, result: AnalysisResult) -> None:
         """Save analysis result to batch for later bulk insert."""
-        # This is a no-op in the base class, overridden in BatchMetadataStore
-        # We still save it immediately for backward compatibility
-        self.save_analysis_result(result)
+        # The base class does not batch, overridden in BatchMetadataStore;
+        # save immediately, off the event loop like the batch flushes
+        await asyncio.get_running_loop().run_in_executor(None, self.save_analysis_result, result)
     
     async def flush_batch(self) -> None:
         """Flush any pending batch writes."""
@@ -200,20 +498,30 @@ class MetadataStore:
     
     def save_photo_metadata_from_path(self, photo_path: str) -> int:
         """Save basic photo metadata from file path."""
-        from photo_hub.photo_search.scanner import PhotoScanner
+        return self.save_photo_metadata(self._metadata_from_path(photo_path))
+    
+    def _metadata_from_path(self, photo_path: str, content_hash: Optional[str] = None) -> PhotoMetadata:
+        """Extract photo metadata from a file, raising ValueError on failure.
         
-        scanner = PhotoScanner(recursive=False)
-        metadata = scanner._extract_metadata(Path(photo_path))
+        The file's content hash is computed unless content_hash is given.
+        """
+        if self._scanner is None:
+            # Imported here: the scanner pulls in PIL, which searching never needs
+            from photo_hub.photo_search.scanner import PhotoScanner
+            self._scanner = PhotoScanner(recursive=False)
+        
+        metadata = self._scanner._extract_metadata(Path(photo_path))
         if metadata:
-            return self.save_photo_metadata(metadata)
-        else:
-            raise ValueError(f"Could not extract metadata from {photo_path}")
+            # Record the content hash so later copies of this file can reuse its analysis
+            metadata.content_hash = content_hash or compute_content_hash(photo_path)
+            return metadata
+        raise ValueError(f"Could not extract metadata from {photo_path}")
     
     def get_photo_metadata(self, photo_path: str) -> Optional[PhotoMetadata]:
         """Get photo metadata by path."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
             cursor.execute("SELECT * FROM photos WHERE path = ?", (photo_path,))
             row = cursor.fetchone()
@@ -224,9 +532,9 @@ class MetadataStore:
     
     def get_analysis_result(self, photo_path: str, llm_model: str) -> Optional[AnalysisResult]:
         """Get analysis result for a photo."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
             cursor.execute("""
                 SELECT ar.*, p.path 
@@ -240,51 +548,182 @@ class MetadataStore:
                 return self._row_to_analysis_result(row)
             return None
     
+    def get_existing_paths(self, llm_model: str, paths: List[str]) -> Set[str]:
+        """Return the subset of paths that already have an analysis for the model."""
+        existing: Set[str] = set()
+        if not paths:
+            return existing
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            
+            # One query per chunk instead of one query per photo
+            for i in range(0, len(paths), SQLITE_MAX_PARAMS_CHUNK):
+                chunk = paths[i:i + SQLITE_MAX_PARAMS_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT p.path
+                    FROM analysis_results ar
+                    JOIN photos p ON ar.photo_id = p.id
+                    WHERE ar.llm_model = ? AND p.path IN ({placeholders})
+                """, (llm_model, *chunk))
+                existing.update(row[0] for row in cursor)
+        
+        return existing
+    
+    def get_analyses_by_content_hash(self, llm_model: str, content_hashes: List[str]) -> Dict[str, AnalysisResult]:
+        """Return an existing analysis by the model for each known content hash."""
+        found: Dict[str, AnalysisResult] = {}
+        if not content_hashes:
+            return found
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            for i in range(0, len(content_hashes), SQLITE_MAX_PARAMS_CHUNK):
+                chunk = content_hashes[i:i + SQLITE_MAX_PARAMS_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT ar.*, p.path, p.content_hash
+                    FROM analysis_results ar
+                    JOIN photos p ON ar.photo_id = p.id
+                    WHERE ar.llm_model = ? AND p.content_hash IN ({placeholders})
+                """, (llm_model, *chunk))
+                for row in cursor:
+                    found.setdefault(row["content_hash"], self._row_to_analysis_result(row))
+        
+        return found
+    
+    def content_hashes(self, paths: List[str]) -> Dict[str, str]:
+        """Return the content hash of each readable path.
+        
+        Hashes stored for photos whose size and modification time still
+        match the file are reused; only new or changed files are read.
+        """
+        hashes: Dict[str, str] = {}
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(paths), SQLITE_MAX_PARAMS_CHUNK):
+                chunk = paths[i:i + SQLITE_MAX_PARAMS_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT path, size, modified_time, content_hash FROM photos "
+                    f"WHERE path IN ({placeholders}) AND content_hash IS NOT NULL",
+                    chunk
+                )
+                for path, size, modified_time, content_hash in cursor.fetchall():
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if stat.st_size == size and _to_epoch_us(datetime.fromtimestamp(stat.st_mtime)) == modified_time:
+                        hashes[path] = content_hash
+        
+        for path in paths:
+            if path not in hashes:
+                try:
+                    hashes[path] = compute_content_hash(path)
+                except OSError:
+                    pass
+        return hashes
+    
+    def find_duplicate_analyses(
+        self, llm_model: str, paths: List[str], hashes: Optional[Dict[str, str]] = None
+    ) -> Dict[str, AnalysisResult]:
+        """Find existing analyses that can be reused for byte-identical photos.
+        
+        Each photo is looked up by the hash of its contents, so copies and
+        moved files map to the analysis of a photo the model already saw.
+        Callers that go on to analyze the other photos can pass the hashes
+        from content_hashes() and set them on those results, so the files
+        are not hashed again when the results are saved.
+        
+        Returns:
+            Mapping of path to a copy of the matching analysis, retargeted to
+            that path; paths without a match or that cannot be read are left out
+        """
+        if hashes is None:
+            hashes = self.content_hashes(paths)
+        known = self.get_analyses_by_content_hash(llm_model, list(set(hashes.values())))
+        return {
+            path: replace(known[content_hash], photo_path=path, content_hash=content_hash)
+            for path, content_hash in hashes.items()
+            if content_hash in known
+        }
+    
     def search_photos(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Search photos by keywords in analysis results."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
             
-            search_term = f"%{query}%"
-            cursor.execute("""
-                SELECT p.*, ar.description, ar.tags
-                FROM photos p
-                LEFT JOIN analysis_results ar ON p.id = ar.photo_id
-                WHERE ar.description LIKE ? 
-                   OR ar.people LIKE ?
-                   OR ar.locations LIKE ?
-                   OR ar.objects LIKE ?
-                   OR ar.tags LIKE ?
-                ORDER BY p.modified_time DESC
-                LIMIT ?
-            """, (search_term, search_term, search_term, search_term, search_term, limit))
+            if self._fts_enabled and len(query) >= FTS_MIN_QUERY_LENGTH:
+                # A quoted phrase on the trigram index matches substrings in any column
+                fts_query = '"' + query.replace('"', '""') + '"'
+                cursor.execute(f"""
+                    SELECT {_SEARCH_PHOTO_COLUMNS}, ar.description, ar.tags
+                    FROM analysis_fts
+                    JOIN analysis_results ar ON ar.id = analysis_fts.rowid
+                    JOIN photos p ON p.id = ar.photo_id
+                    WHERE analysis_fts MATCH ?
+                    ORDER BY p.modified_time DESC
+                    LIMIT ?
+                """, (fts_query, limit))
+            else:
+                search_term = f"%{query}%"
+                cursor.execute(f"""
+                    SELECT {_SEARCH_PHOTO_COLUMNS}, ar.description, ar.tags
+                    FROM photos p
+                    LEFT JOIN analysis_results ar ON p.id = ar.photo_id
+                    WHERE ar.description LIKE ? 
+                       OR ar.people LIKE ?
+                       OR ar.locations LIKE ?
+                       OR ar.objects LIKE ?
+                       OR ar.tags LIKE ?
+                    ORDER BY p.modified_time DESC
+                    LIMIT ?
+                """, (search_term, search_term, search_term, search_term, search_term, limit))
+            
+            # Plain tuples zipped with the column names once per query are
+            # cheaper than building a sqlite3.Row and copying it per result
+            columns = [column[0] for column in cursor.description]
+            tags_index = columns.index("tags")
+            time_indexes = (columns.index("created_time"), columns.index("modified_time"))
             
             results = []
-            for row in cursor.fetchall():
-                result = dict(row)
-                # Parse JSON fields
-                for field in ["people", "locations", "objects", "tags"]:
-                    if result.get(field):
-                        result[field] = json.loads(result[field])
-                results.append(result)
+            for row in cursor:
+                values = list(row)
+                # Tags are the only JSON list column selected; decode them once
+                # here so callers always get Python lists
+                if values[tags_index]:
+                    values[tags_index] = _json_loads(values[tags_index])
+                # Callers get timestamps as ISO strings, as before they were
+                # stored as integers
+                for index in time_indexes:
+                    values[index] = _from_epoch_us(values[index]).isoformat()
+                results.append(dict(zip(columns, values)))
             
             return results
     
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             stats = {}
-            cursor.execute("SELECT COUNT(*) FROM photos")
-            stats["total_photos"] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM analysis_results")
-            stats["total_analyses"] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(DISTINCT llm_model) FROM analysis_results")
-            stats["models_used"] = cursor.fetchone()[0]
+            # One round trip: the photo count comes first with a NULL model
+            # (llm_model is NOT NULL), followed by the per-model breakdown
+            cursor.execute("""
+                SELECT NULL, COUNT(*) FROM photos
+                UNION ALL
+                SELECT llm_model, COUNT(*) FROM analysis_results GROUP BY llm_model
+            """)
+            rows = cursor.fetchall()
+            stats["total_photos"] = rows[0][1]
+            per_model = dict(rows[1:])
+            stats["total_analyses"] = sum(per_model.values())
+            stats["models_used"] = len(per_model)
+            stats["per_model"] = per_model
             
             return stats
     
@@ -294,12 +733,13 @@ class MetadataStore:
             path=row["path"],
             filename=row["filename"],
             size=row["size"],
-            created_time=datetime.fromisoformat(row["created_time"]),
-            modified_time=datetime.fromisoformat(row["modified_time"]),
+            created_time=_from_epoch_us(row["created_time"]),
+            modified_time=_from_epoch_us(row["modified_time"]),
             image_width=row["image_width"],
             image_height=row["image_height"],
             format=row["format"],
-            exif_data=json.loads(row["exif_data"]) if row["exif_data"] else {},
+            exif_data=_exif_loads(row["exif_data"]),
+            content_hash=row["content_hash"],
         )
     
     def _row_to_analysis_result(self, row) -> AnalysisResult:
@@ -308,11 +748,11 @@ class MetadataStore:
             photo_path=row["path"],
             llm_model=row["llm_model"],
             description=row["description"],
-            people=json.loads(row["people"]) if row["people"] else [],
-            locations=json.loads(row["locations"]) if row["locations"] else [],
-            objects=json.loads(row["objects"]) if row["objects"] else [],
-            tags=json.loads(row["tags"]) if row["tags"] else [],
-            generated_at=datetime.fromisoformat(row["generated_at"]),
+            people=_json_loads(row["people"]) if row["people"] else [],
+            locations=_json_loads(row["locations"]) if row["locations"] else [],
+            objects=_json_loads(row["objects"]) if row["objects"] else [],
+            tags=_json_loads(row["tags"]) if row["tags"] else [],
+            generated_at=_from_epoch_us(row["generated_at"]),
         )
 
 
@@ -324,121 +764,77 @@ class BatchMetadataStore(MetadataStore):
         self.batch_size = batch_size
         self._pending_results: List[AnalysisResult] = []
         self._pending_metadata: List[PhotoMetadata] = []
+        # Guards the pending lists; only held to append or to swap a full
+        # list for an empty one, so producers keep appending during a flush
         self._lock = asyncio.Lock()
+        # Serializes flushes. asyncio.Lock wakes waiters in FIFO order and a
+        # batch queues for it right after being swapped out, so batches are
+        # committed in the order they were filled and never race each other
+        # for SQLite's write lock
+        self._flush_lock = asyncio.Lock()
     
     async def save_analysis_result_batch(self, result: AnalysisResult) -> None:
         """Save analysis result to batch for later bulk insert."""
         async with self._lock:
             self._pending_results.append(result)
-            if len(self._pending_results) >= self.batch_size:
-                await self._flush_results()
+            full = len(self._pending_results) >= self.batch_size
+        if full:
+            await self._flush_results()
     
     async def save_photo_metadata_batch(self, metadata: PhotoMetadata) -> None:
         """Save photo metadata to batch for later bulk insert."""
         async with self._lock:
             self._pending_metadata.append(metadata)
-            if len(self._pending_metadata) >= self.batch_size:
-                await self._flush_metadata()
+            full = len(self._pending_metadata) >= self.batch_size
+        if full:
+            await self._flush_metadata()
     
     async def flush_batch(self) -> None:
-        """Flush any pending batch writes."""
-        async with self._lock:
-            if self._pending_results:
-                await self._flush_results()
-            if self._pending_metadata:
-                await self._flush_metadata()
+        """Flush any pending batch writes, waiting for flushes already running."""
+        await self._flush_results()
+        await self._flush_metadata()
+        # Flushes run in FIFO order, so once the lock is ours all are done
+        async with self._flush_lock:
+            pass
     
     async def _flush_results(self) -> None:
         """Flush pending analysis results to database."""
-        if not self._pending_results:
-            return
-        
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Prepare batch insert
-                batch_data = []
-                for result in self._pending_results:
-                    # First ensure photo exists
-                    photo_id = self.save_photo_metadata_from_path(result.photo_path)
-                    
-                    batch_data.append((
-                        photo_id,
-                        result.llm_model,
-                        result.description,
-                        json.dumps(result.people),
-                        json.dumps(result.locations),
-                        json.dumps(result.objects),
-                        json.dumps(result.tags),
-                        result.generated_at.isoformat(),
-                    ))
-                
-                # Use INSERT OR REPLACE to handle duplicates
-                cursor.executemany("""
-                    INSERT OR REPLACE INTO analysis_results (
-                        photo_id, llm_model, description,
-                        people, locations, objects, tags, generated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, batch_data)
-                
-                conn.commit()
-                logger.info(f"Flushed {len(batch_data)} analysis results to database")
-                
-        except Exception as e:
-            logger.error(f"Failed to flush analysis results batch: {e}")
-            # Fall back to individual saves
-            for result in self._pending_results:
-                try:
-                    self.save_analysis_result(result)
-                except Exception as inner_e:
-                    logger.error(f"Failed to save individual result: {inner_e}")
-        finally:
-            self._pending_results.clear()
+        async with self._lock:
+            pending, self._pending_results = self._pending_results, []
+        if pending:
+            await self._write(self._flush_results_sync, pending)
     
     async def _flush_metadata(self) -> None:
         """Flush pending photo metadata to database."""
-        if not self._pending_metadata:
-            return
+        async with self._lock:
+            pending, self._pending_metadata = self._pending_metadata, []
+        if pending:
+            await self._write(self._flush_metadata_sync, pending)
+    
+    async def _write(self, flush: Callable[[list], None], pending: list) -> None:
+        """Run a flush after the ones queued before it.
         
+        SQLite I/O (and reading file metadata) runs in a worker thread so
+        the event loop keeps serving in-flight analyses meanwhile.
+        """
+        async with self._flush_lock:
+            await asyncio.get_running_loop().run_in_executor(None, flush, pending)
+    
+    def _flush_results_sync(self, pending: List[AnalysisResult]) -> None:
+        """Write a batch of analysis results, saving one by one if the batch fails."""
+        failures = self.save_analysis_results_with_fallback(pending)
+        logger.info(f"Flushed {len(pending) - failures} analysis results to database")
+    
+    def _flush_metadata_sync(self, pending: List[PhotoMetadata]) -> None:
+        """Write a batch of photo metadata, saving one by one if the batch fails."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Prepare batch insert
-                batch_data = []
-                for metadata in self._pending_metadata:
-                    batch_data.append((
-                        metadata.path,
-                        metadata.filename,
-                        metadata.size,
-                        metadata.created_time.isoformat(),
-                        metadata.modified_time.isoformat(),
-                        metadata.image_width,
-                        metadata.image_height,
-                        metadata.format,
-                        json.dumps(metadata.exif_data),
-                        metadata.file_hash,
-                    ))
-                
-                # Use INSERT OR REPLACE to handle duplicates
-                cursor.executemany("""
-                    INSERT OR REPLACE INTO photos (
-                        path, filename, size, created_time, modified_time,
-                        image_width, image_height, format, exif_data, file_hash
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, batch_data)
-                
-                conn.commit()
-                logger.info(f"Flushed {len(batch_data)} photo metadata records to database")
-                
+            self.save_photo_metadata_bulk(pending)
+            logger.info(f"Flushed {len(pending)} photo metadata records to database")
         except Exception as e:
             logger.error(f"Failed to flush metadata batch: {e}")
             # Fall back to individual saves
-            for metadata in self._pending_metadata:
+            for metadata in pending:
                 try:
                     self.save_photo_metadata(metadata)
                 except Exception as inner_e:
-                    logger.error(f"Failed to save individual metadata: {inner_e}")
-        finally:
-            self._pending_metadata.clear()
\ No newline at end of file
+                    logger.error(f"Failed to save individual metadata: {inner_e}")
\ No newline at end of file
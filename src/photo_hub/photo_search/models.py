@@ -19,10 +19,14 @@ class PhotoMetadata:
     image_height: Optional[int] = None
     format: Optional[str] = None
     exif_data: Dict[str, Any] = field(default_factory=dict)
+    content_hash: Optional[str] = None  # hash of the file bytes, see compute_content_hash
     
     @property
     def file_hash(self) -> str:
-        """Calculate MD5 hash of the file for deduplication."""
+        """MD5 of the path, identifying the file by location.
+        
+        Deduplication of identical files uses content_hash instead.
+        """
         return hashlib.md5(self.path.encode()).hexdigest()
     
     @property
@@ -31,6 +35,15 @@ class PhotoMetadata:
         return str(Path(self.path).parent)
 
 
+def compute_content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash a file's contents so identical copies can share one analysis."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 @dataclass
 class AnalysisResult:
     """LLM analysis result for a photo."""
@@ -42,6 +55,9 @@ class AnalysisResult:
     objects: List[str] = field(default_factory=list)
     tags: List[str] = field(default_factory=list)
     generated_at: datetime = field(default_factory=datetime.now)
+    # Hash of the photo's file bytes when the caller already computed it,
+    # so saving the result does not read the whole file again
+    content_hash: Optional[str] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage."""
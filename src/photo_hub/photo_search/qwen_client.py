@@ -3,13 +3,10 @@
 import asyncio
 import base64
 import logging
-import time
-import json
-import re
-from typing import List, Optional, Dict, Any
-from pathlib import Path
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from PIL import Image
-from datetime import datetime
 
 try:
     import openai
@@ -21,11 +18,14 @@ except ImportError:
     AsyncOpenAI = None
 
 from photo_hub.photo_search.models import AnalysisResult
-from photo_hub.photo_search.base import PhotoAnalyzer
-from photo_hub.photo_search.config import Language, get_prompt_for_language
+from photo_hub.photo_search.base import AdaptiveRateLimiter, PhotoAnalyzer, is_rate_limit_error, warn_if_slow_jpeg_decoder
+from photo_hub.photo_search.config import Language, get_multi_image_prompt, get_prompt_for_language
 
 logger = logging.getLogger(__name__)
 
+# Photos loaded ahead of the current request in sequential batch_analyze
+PREFETCH_IMAGES = 4
+
 # Default prompt for photo analysis (same as Gemini for consistency)
 DEFAULT_PROMPT = """Analyze this photo and provide a detailed description. Include:
 1. Main scene description (what is happening in the photo)
@@ -44,43 +44,6 @@ Return the analysis in this exact JSON format:
 }"""
 
 
-class AdaptiveRateLimiter:
-    """Adaptive rate limiter that adjusts delays based on API responses."""
-    
-    def __init__(self, initial_delay: float = 1.0, min_delay: float = 0.1, max_delay: float = 60.0):
-        self.delay = initial_delay
-        self.min_delay = min_delay
-        self.max_delay = max_delay
-        self.success_count = 0
-        self.error_count = 0
-        self.consecutive_errors = 0
-        self._lock = asyncio.Lock()
-    
-    async def wait(self):
-        """Wait for the current delay period."""
-        await asyncio.sleep(self.delay)
-    
-    async def adjust_delay(self, success: bool):
-        """Adjust delay based on API call success."""
-        async with self._lock:
-            if success:
-                self.success_count += 1
-                self.consecutive_errors = 0
-                # If we have many successes, reduce delay
-                if self.success_count > 10:
-                    self.delay = max(self.min_delay, self.delay * 0.9)
-                    self.success_count = 0
-            else:
-                self.error_count += 1
-                self.consecutive_errors += 1
-                self.success_count = 0
-                # Increase delay on errors
-                if self.consecutive_errors > 2:
-                    self.delay = min(self.max_delay, self.delay * 1.5)
-                elif self.consecutive_errors > 0:
-                    self.delay = min(self.max_delay, self.delay * 1.2)
-
-
 class QwenPhotoAnalyzer(PhotoAnalyzer):
     """Analyze photos using Qwen API with OpenAI-compatible interface."""
     
@@ -96,10 +59,13 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
                 "Install with: pip install openai"
             )
         
+        warn_if_slow_jpeg_decoder()
+        
         self._model = model
         self._rate_limit_delay = 1  # seconds between requests (reasonable default)
         self._max_concurrent = 5
         self._batch_size = 10
+        self._images_per_request = 1
         
         # Initialize adaptive rate limiter
         self.rate_limiter = AdaptiveRateLimiter(initial_delay=1.0)
@@ -132,11 +98,14 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
     
     def analyze_photo(self, image_path: str, prompt: Optional[str] = None, language: Language = Language.AUTO) -> AnalysisResult:
         """Analyze a single photo with Qwen."""
+        # Load, preprocess and encode image
+        img_base64 = self._load_image_base64(image_path)
+        return self._analyze_photo_encoded(image_path, img_base64, prompt, language)
+    
+    def _analyze_photo_encoded(self, image_path: str, img_base64: str, prompt: Optional[str], language: Language) -> AnalysisResult:
+        """Analyze a photo that has already been encoded with _load_image_base64."""
         logger.info(f"Analyzing photo with Qwen: {image_path} with language: {language}")
         
-        # Load and preprocess image
-        image_data = self._load_and_preprocess_image(image_path)
-        
         # Get appropriate prompt based on language if no custom prompt provided
         if prompt is None:
             prompt = get_prompt_for_language(language)
@@ -146,8 +115,8 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
             if self.client is None:
                 raise ImportError("OpenAI client not available. Please install openai package.")
             
-            # Encode image to base64
-            img_base64 = self._pil_to_base64(image_data)
+            # Wait for a rate-limit slot before the request, not after it
+            self.rate_limiter.acquire_sync()
             
             # Call Qwen API following official documentation
             # Note: Qwen API may not support all OpenAI parameters like max_tokens, temperature
@@ -189,13 +158,13 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
             assert response_text is not None
             result = self._parse_response(response_text, image_path)
             
-            # Rate limiting
-            time.sleep(self._rate_limit_delay)
+            self.rate_limiter.adjust_delay_sync(success=True)
             
             return result
             
         except Exception as e:
             logger.error(f"Qwen API error for {image_path}: {e}")
+            self.rate_limiter.adjust_delay_sync(success=False, rate_limited=is_rate_limit_error(e))
             
             # Provide helpful error messages
             error_msg = str(e)
@@ -236,16 +205,16 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
             logger.warning("Async client not available, falling back to synchronous analysis")
             return self.analyze_photo(image_path, prompt, language)
         
-        # Load and preprocess image
-        image_data = self._load_and_preprocess_image(image_path)
+        # Load, preprocess and encode the image in a worker thread
+        img_base64 = await self._run_in_io_pool(self._load_image_base64, image_path)
         
         # Get appropriate prompt based on language if no custom prompt provided
         if prompt is None:
             prompt = get_prompt_for_language(language)
         
         try:
-            # Encode image to base64
-            img_base64 = self._pil_to_base64(image_data)
+            # Adaptive rate limiting: wait for a slot before the request
+            await self.rate_limiter.acquire()
             
             # Call Qwen API asynchronously
             try:
@@ -284,8 +253,6 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
             assert response_text is not None
             result = self._parse_response(response_text, image_path)
             
-            # Adaptive rate limiting
-            await self.rate_limiter.wait()
             await self.rate_limiter.adjust_delay(success=True)
             
             return result
@@ -294,7 +261,7 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
             logger.error(f"Qwen API async error for {image_path}: {e}")
             
             # Update rate limiter on error
-            await self.rate_limiter.adjust_delay(success=False)
+            await self.rate_limiter.adjust_delay(success=False, rate_limited=is_rate_limit_error(e))
             
             # Provide helpful error messages
             error_msg = str(e)
@@ -320,6 +287,84 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
                 )
             raise
     
+    def analyze_photos(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
+        """Analyze several photos with a single multi-image Qwen request."""
+        if len(image_paths) == 1:
+            return [self.analyze_photo(image_paths[0], prompt, language)]
+        logger.info(f"Analyzing {len(image_paths)} photos in one request with Qwen with language: {language}")
+        
+        if self.client is None:
+            raise ImportError("OpenAI client not available. Please install openai package.")
+        
+        images_base64 = [self._load_image_base64(image_path) for image_path in image_paths]
+        messages = self._build_multi_image_messages(images_base64, prompt, language)
+        try:
+            self.rate_limiter.acquire_sync()
+            response = self.client.chat.completions.create(model=self.model, messages=messages)
+            
+            response_text = response.choices[0].message.content
+            if response_text is None:
+                raise ValueError(f"Qwen API returned empty response for {len(image_paths)} photos")
+            results = self._parse_batch_response(response_text, image_paths)
+            
+            self.rate_limiter.adjust_delay_sync(success=True)
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Qwen API error for {len(image_paths)} photos: {e}")
+            self.rate_limiter.adjust_delay_sync(success=False, rate_limited=is_rate_limit_error(e))
+            raise
+    
+    async def analyze_photos_async(self, image_paths: List[str], prompt: Optional[str] = None, language: Language = Language.AUTO) -> List[AnalysisResult]:
+        """Asynchronously analyze several photos with a single multi-image Qwen request."""
+        if len(image_paths) == 1:
+            return [await self.analyze_photo_async(image_paths[0], prompt, language)]
+        
+        if self.async_client is None:
+            logger.warning("Async client not available, falling back to synchronous analysis")
+            return self.analyze_photos(image_paths, prompt, language)
+        logger.info(f"Analyzing {len(image_paths)} photos asynchronously in one request with Qwen with language: {language}")
+        
+        # Load and encode the images in parallel worker threads
+        images_base64 = await asyncio.gather(
+            *(self._run_in_io_pool(self._load_image_base64, image_path) for image_path in image_paths)
+        )
+        messages = self._build_multi_image_messages(list(images_base64), prompt, language)
+        try:
+            await self.rate_limiter.acquire()
+            response = await self.async_client.chat.completions.create(model=self.model, messages=messages)
+            
+            response_text = response.choices[0].message.content
+            if response_text is None:
+                raise ValueError(f"Qwen API returned empty response for {len(image_paths)} photos")
+            results = self._parse_batch_response(response_text, image_paths)
+            
+            await self.rate_limiter.adjust_delay(success=True)
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Qwen API async error for {len(image_paths)} photos: {e}")
+            await self.rate_limiter.adjust_delay(success=False, rate_limited=is_rate_limit_error(e))
+            raise
+    
+    def _build_multi_image_messages(
+        self, 
+        images_base64: List[str], 
+        prompt: Optional[str],
+        language: Language
+    ) -> List[Dict[str, Any]]:
+        """Build chat messages carrying one prompt followed by every encoded image."""
+        if prompt is None:
+            prompt = get_prompt_for_language(language)
+        content: List[Dict[str, Any]] = [
+            {"type": "text", "text": get_multi_image_prompt(prompt, len(images_base64), language)}
+        ]
+        for img_base64 in images_base64:
+            content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_base64}"}})
+        return [{"role": "user", "content": content}]
+    
     def batch_analyze(
         self, 
         image_paths: List[str], 
@@ -327,43 +372,87 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
         language: Language = Language.AUTO
     ) -> List[AnalysisResult]:
         """Analyze multiple photos with rate limiting."""
-        results = []
-        for i, image_path in enumerate(image_paths):
+        return list(self.iter_analyze(image_paths, prompt, language))
+    
+    def iter_analyze(
+        self, 
+        image_paths: Iterable[str], 
+        prompt: Optional[str] = None,
+        language: Language = Language.AUTO
+    ) -> Iterator[AnalysisResult]:
+        """Analyze photos one request at a time, yielding each result as it is ready."""
+        if self._images_per_request > 1:
+            yield from super().iter_analyze(image_paths, prompt, language)
+            return
+        
+        if prompt is None:
+            # Resolve the default once rather than once per photo
+            prompt = get_prompt_for_language(language)
+        
+        # Load and encode the next few photos in worker threads while the
+        # current request is in flight; the look-ahead bounds memory use
+        paths = iter(image_paths)
+        prefetched = deque(
+            (path, self._submit_to_io_pool(self._load_image_base64, path))
+            for path in islice(paths, PREFETCH_IMAGES)
+        )
+        completed = 0
+        while prefetched:
+            image_path, future = prefetched.popleft()
+            prefetched.extend(
+                (path, self._submit_to_io_pool(self._load_image_base64, path))
+                for path in islice(paths, 1)
+            )
             try:
-                result = self.analyze_photo(image_path, prompt, language)
-                results.append(result)
-                logger.info(f"Completed {i+1}/{len(image_paths)}: {image_path}")
+                result = self._analyze_photo_encoded(image_path, future.result(), prompt, language)
             except Exception as e:
                 logger.error(f"Failed to analyze {image_path}: {e}")
                 # Continue with next photo
                 continue
-        return results
+            completed += 1
+            logger.info(f"Completed {completed}: {image_path}")
+            yield result
     
     def _load_and_preprocess_image(self, image_path: str) -> Image.Image:
         """Load image and return PIL Image object."""
-        path = Path(image_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Image not found: {image_path}")
-        
-        # Open with PIL to validate and potentially resize
+        # Open with PIL to validate and potentially resize; a missing file
+        # surfaces from Image.open instead of a separate exists() check
         try:
             img = Image.open(image_path)
+            max_size = 2048
+            # Let libjpeg decode large JPEGs at a reduced scale (1/2 to 1/8)
+            # rather than decoding every pixel and discarding most of them
+            if img.format == "JPEG" and max(img.size) > max_size:
+                ratio = max_size / max(img.size)
+                img.draft("RGB", (int(img.size[0] * ratio), int(img.size[1] * ratio)))
+            
             # Convert to RGB if necessary
             if img.mode in ("RGBA", "LA", "P"):
                 img = img.convert("RGB")
             
-            # Resize if too large (API may have limits)
-            max_size = 2048
+            # Resize if still too large (API may have limits); BILINEAR is antialiased
+            # on downscale like LANCZOS and about twice as fast
             if max(img.size) > max_size:
                 ratio = max_size / max(img.size)
                 new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+                img = img.resize(new_size, Image.Resampling.BILINEAR)
             
             # Return the image object
             return img
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image not found: {image_path}") from None
         except Exception as e:
             raise ValueError(f"Failed to load image {image_path}: {e}")
     
+    def _load_image_base64(self, image_path: str) -> str:
+        """Load, preprocess and base64-encode an image for the API."""
+        img = self._load_and_preprocess_image(image_path)
+        try:
+            return self._pil_to_base64(img)
+        finally:
+            # Free the pixel buffer now rather than when the image is collected
+            img.close()
+    
     def _pil_to_base64(self, img: Image.Image) -> str:
         """Convert PIL Image to base64 string."""
         import io
@@ -372,52 +461,6 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
         img_str = base64.b64encode(buffered.getvalue()).decode()
         return img_str
     
-    def _parse_response(self, response_text: str, image_path: str) -> AnalysisResult:
-        """Parse Qwen response into AnalysisResult."""
-        # Extract JSON from response (might have markdown code blocks)
-        
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if not json_match:
-            logger.warning(f"No JSON found in response for {image_path}")
-            # Fallback: use entire response as description
-            return AnalysisResult(
-                photo_path=image_path,
-                llm_model=self.model,
-                description=response_text.strip(),
-                people=[],
-                locations=[],
-                objects=[],
-                tags=[],
-                generated_at=datetime.now()
-            )
-        
-        try:
-            data = json.loads(json_match.group())
-            return AnalysisResult(
-                photo_path=image_path,
-                llm_model=self.model,
-                description=data.get("description", ""),
-                people=data.get("people", []),
-                locations=data.get("locations", []),
-                objects=data.get("objects", []),
-                tags=data.get("tags", []),
-                generated_at=datetime.now()
-            )
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response for {image_path}: {e}")
-            # Fallback
-            return AnalysisResult(
-                photo_path=image_path,
-                llm_model=self.model,
-                description=response_text.strip(),
-                people=[],
-                locations=[],
-                objects=[],
-                tags=[],
-                generated_at=datetime.now()
-            )
-    
     def set_rate_limit_delay(self, seconds: float) -> None:
         """Set delay between API calls (for rate limiting)."""
         self._rate_limit_delay = seconds
@@ -430,6 +473,10 @@ class QwenPhotoAnalyzer(PhotoAnalyzer):
     def set_batch_size(self, batch_size: int) -> None:
         """Set batch size for processing."""
         self._batch_size = batch_size
+    
+    def set_images_per_request(self, images_per_request: int) -> None:
+        """Set how many photos are sent together in one API request."""
+        self._images_per_request = images_per_request
 
 
 # Convenience function
@@ -24,34 +24,44 @@ class PhotoScanner:
     
     def scan_directory(self, directory: str) -> List[PhotoMetadata]:
         """Scan a directory and return list of photo metadata."""
+        return list(self.iter_directory(directory))
+    
+    def iter_directory(self, directory: str) -> Iterator[PhotoMetadata]:
+        """Yield photo metadata from a directory as it is walked.
+        
+        The directory is validated immediately, so a ValueError is raised by
+        this call rather than on first iteration.
+        """
         directory_path = Path(directory).resolve()
         if not directory_path.is_dir():
             raise ValueError(f"Not a directory: {directory}")
-        
-        photos = []
-        for photo_meta in self._scan_directory_iter(directory_path):
-            photos.append(photo_meta)
-        
+        return self._iter_and_log(directory_path)
+    
+    def _iter_and_log(self, directory: Path) -> Iterator[PhotoMetadata]:
+        """Walk directory and log the scan summary once it is exhausted."""
+        yield from self._scan_directory_iter(directory)
         logger.info(
             f"Scan completed: {self._stats['scanned']} scanned, "
             f"{self._stats['skipped']} skipped, {self._stats['errors']} errors"
         )
-        return photos
     
     def _scan_directory_iter(self, directory: Path) -> Iterator[PhotoMetadata]:
         """Generator that yields photo metadata from directory."""
         try:
-            entries = list(directory.iterdir())
+            # os.scandir reports entry types from the directory listing,
+            # so non-photo entries are filtered without a stat() each
+            with os.scandir(directory) as it:
+                entries = list(it)
         except PermissionError:
             logger.warning(f"Permission denied: {directory}")
             return
         
         for entry in entries:
             if entry.is_dir() and self.recursive:
-                yield from self._scan_directory_iter(entry)
-            elif entry.is_file() and entry.suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield from self._scan_directory_iter(Path(entry.path))
+            elif os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS and entry.is_file():
                 try:
-                    photo_meta = self._extract_metadata(entry)
+                    photo_meta = self._extract_metadata(Path(entry.path))
                     if photo_meta:
                         self._stats["scanned"] += 1
                         yield photo_meta
@@ -105,4 +115,10 @@ class PhotoScanner:
 def scan_photos(directory: str, recursive: bool = True) -> List[PhotoMetadata]:
     """Convenience function to scan photos in a directory."""
     scanner = PhotoScanner(recursive=recursive)
-    return scanner.scan_directory(directory)
\ No newline at end of file
+    return scanner.scan_directory(directory)
+
+
+def iter_photos(directory: str, recursive: bool = True) -> Iterator[PhotoMetadata]:
+    """Convenience function to stream photos from a directory as they are found."""
+    scanner = PhotoScanner(recursive=recursive)
+    return scanner.iter_directory(directory)
\ No newline at end of file
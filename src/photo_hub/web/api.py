@@ -233,15 +233,29 @@ async def scan_directory_task_async(task_id: str, request: ScanRequest):
         
         # Filter out already analyzed photos if requested
         skipped_files = 0
+        # Content hashes computed for the duplicate check, set on the new
+        # results so saving them does not rehash the files
+        content_hashes: Dict[str, str] = {}
         if request.skip_existing:
+            existing = store.get_existing_paths(analyzer.model, [photo.path for photo in photos])
             filtered_photos = []
             for photo in photos:
-                existing = store.get_analysis_result(photo.path, analyzer.model)
-                if existing:
+                if photo.path in existing:
                     logging.debug(f"Skipping already analyzed: {photo.filename} (model: {analyzer.model})")
                     skipped_files += 1
                 else:
                     filtered_photos.append(photo)
+            
+            # Copies of already analyzed files reuse that analysis instead of an API call
+            filtered_paths = [photo.path for photo in filtered_photos]
+            content_hashes = store.content_hashes(filtered_paths)
+            duplicates = store.find_duplicate_analyses(analyzer.model, filtered_paths, content_hashes)
+            failed_reuses = 0
+            if duplicates:
+                failed_reuses = store.save_analysis_results_with_fallback(list(duplicates.values()))
+                filtered_photos = [photo for photo in filtered_photos if photo.path not in duplicates]
+            task_info["reused_files"] = len(duplicates) - failed_reuses
+            
             photos = filtered_photos
             task_info["total_files"] = len(photos)
         
@@ -271,18 +285,21 @@ async def scan_directory_task_async(task_id: str, request: ScanRequest):
         
         # Use async batch analysis if available
         try:
-            results = await analyzer.batch_analyze_async(
+            results = analyzer.iter_analyze_async(
                 image_paths=image_paths,
                 language=language_enum,  # type: ignore
                 max_concurrent=max_concurrent,
                 batch_size=batch_size
             )
             
-            # Save results with batch support
-            for i, result in enumerate(results):
+            # Save results with batch support as they complete
+            processed = 0
+            async for result in results:
+                result.content_hash = content_hashes.get(result.photo_path)
+                processed += 1
                 task_info["current_file"] = Path(result.photo_path).name
-                task_info["processed_files"] = i + 1
-                task_info["progress"] = 0.2 + ((i + 1) / len(photos) * 0.8) if photos else 0.8
+                task_info["processed_files"] = processed
+                task_info["progress"] = 0.2 + (processed / len(photos) * 0.8)
                 
                 if task_info["batch_mode"]:
                     await batch_store.save_analysis_result_batch(result)
@@ -291,6 +308,9 @@ async def scan_directory_task_async(task_id: str, request: ScanRequest):
                 
                 successful += 1
                 logging.info(f"Analyzed: {Path(result.photo_path).name}")
+            
+            # Photos whose analysis raised are left out of the results
+            failed += len(image_paths) - processed
                 
         except (AttributeError, NotImplementedError):
             # Fall back to synchronous processing if async not available
@@ -302,6 +322,7 @@ async def scan_directory_task_async(task_id: str, request: ScanRequest):
                 
                 try:
                     result = analyzer.analyze_photo(photo.path, language=language_enum)  # type: ignore
+                    result.content_hash = content_hashes.get(result.photo_path)
                     store.save_analysis_result(result)
                     successful += 1
                     logging.info(f"Analyzed: {photo.filename}")
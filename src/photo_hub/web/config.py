@@ -3,7 +3,7 @@
 import json
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 # Default configuration for end-users
 DEFAULT_DB_PATH = str(Path.home() / ".photo-hub" / "database.db")
@@ -26,6 +26,9 @@ ENV_QWEN_API_KEY = "QWEN_API_KEY"
 class WebConfig:
     """Configuration manager for web application."""
     
+    # Persisted fields that can be updated via `photo-hub config --set`
+    _FIELDS = frozenset({"db_path", "model", "language", "max_concurrent", "batch_size"})
+    
     def __init__(
         self,
         db_path: Optional[str] = None,
@@ -79,6 +82,12 @@ class WebConfig:
             logging.warning(f"Failed to load config file {config_path}: {e}")
             return cls()
     
+    @classmethod
+    def load_from_file_with_path(cls, custom_path: Optional[str] = None) -> Tuple["WebConfig", Path]:
+        """Load configuration and return it together with the resolved file path."""
+        config_path = cls.get_config_path(custom_path)
+        return cls.load_from_file(config_path), config_path
+    
     def save_to_file(self, config_path: Optional[Path] = None) -> None:
         """Save configuration to JSON file."""
         if config_path is None:
@@ -129,7 +138,8 @@ class WebConfig:
             "qwen_api_key_set": bool(self.qwen_api_key),
         }
     
-    def get_config_path(self, custom_path: Optional[str] = None) -> Path:
+    @staticmethod
+    def get_config_path(custom_path: Optional[str] = None) -> Path:
         """Get configuration file path."""
         if custom_path:
             return Path(custom_path)
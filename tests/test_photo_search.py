@@ -100,6 +100,24 @@ class TestMetadataStore:
         # Should create tables without error
         assert os.path.exists(temp_db)
     
+    def test_connection_reused_per_thread(self, temp_db):
+        """Test that each thread keeps its own open connection."""
+        import threading
+        
+        store = MetadataStore(temp_db)
+        conn = store._connect()
+        assert store._connect() is conn
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(store._connect()))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+        
+        store.close()
+        assert store._connect() is not conn
+        assert store.get_stats()["total_photos"] == 0
+    
     def test_save_and_retrieve_photo_metadata(self, temp_db):
         """Test saving and retrieving photo metadata."""
         store = MetadataStore(temp_db)
@@ -128,6 +146,117 @@ class TestMetadataStore:
         assert retrieved.filename == metadata.filename
         assert retrieved.size == metadata.size
     
+    def test_timestamps_migrated_from_iso_text(self, temp_db):
+        """Test that timestamps round-trip and old ISO text rows are converted."""
+        import sqlite3
+        
+        store = MetadataStore(temp_db)
+        created = datetime(2024, 5, 1, 12, 30, 15, 123456)
+        store.save_photo_metadata(PhotoMetadata(
+            path="/tmp/old.jpg",
+            filename="old.jpg",
+            size=1024,
+            created_time=created,
+            modified_time=created,
+        ))
+        assert store.get_photo_metadata("/tmp/old.jpg").created_time == created
+        store.close()
+        
+        # Simulate a database written before timestamps were stored as integers
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("UPDATE photos SET created_time = ?, modified_time = ?", (created.isoformat(), created.isoformat()))
+            conn.execute("PRAGMA user_version = 0")
+        
+        store = MetadataStore(temp_db)
+        assert store.get_photo_metadata("/tmp/old.jpg").modified_time == created
+    
+    def test_unchanged_photo_not_rewritten(self, temp_db):
+        """Test that saving unchanged photo metadata writes nothing."""
+        store = MetadataStore(temp_db)
+        metadata = PhotoMetadata(
+            path="/tmp/static.jpg",
+            filename="static.jpg",
+            size=1024,
+            created_time=datetime.now(),
+            modified_time=datetime.now(),
+        )
+        photo_id = store.save_photo_metadata(metadata)
+        
+        conn = store._connect()
+        changes = conn.total_changes
+        assert store.save_photo_metadata(metadata) == photo_id
+        assert conn.total_changes == changes
+        
+        metadata.size = 2048
+        assert store.save_photo_metadata(metadata) == photo_id
+        assert store.get_photo_metadata("/tmp/static.jpg").size == 2048
+    
+    def test_save_photo_metadata_bulk(self, temp_db):
+        """Test that bulk saves return IDs in input order and keep existing IDs."""
+        store = MetadataStore(temp_db)
+        metadata_list = [
+            PhotoMetadata(
+                path=f"/tmp/bulk{i}.jpg",
+                filename=f"bulk{i}.jpg",
+                size=1024,
+                created_time=datetime.now(),
+                modified_time=datetime.now(),
+            )
+            for i in range(3)
+        ]
+        first_id = store.save_photo_metadata(metadata_list[1])
+        
+        photo_ids = store.save_photo_metadata_bulk(metadata_list[::-1])
+        assert len(set(photo_ids)) == 3
+        assert photo_ids[1] == first_id
+        assert store.save_photo_metadata_bulk(metadata_list) == photo_ids[::-1]
+        assert store.save_photo_metadata_bulk([]) == []
+    
+    def test_json_columns(self, temp_db, tmp_path):
+        """Test that raw EXIF values are stored and non-ASCII tags stay searchable."""
+        from PIL import Image
+        
+        store = MetadataStore(temp_db)
+        
+        metadata = PhotoMetadata(
+            path="/tmp/exif.jpg",
+            filename="exif.jpg",
+            size=1024,
+            created_time=datetime.now(),
+            modified_time=datetime.now(),
+            exif_data={271: "Canon", 37500: b"\x00\x01"}
+        )
+        store.save_photo_metadata(metadata)
+        assert store.get_photo_metadata("/tmp/exif.jpg").exif_data["271"] == "Canon"
+        
+        # Large EXIF is compressed, older uncompressed rows are migrated
+        metadata.exif_data = {271: "Canon", 37500: "x" * 4096}
+        metadata.size = 2048
+        store.save_photo_metadata(metadata)
+        conn = store._connect()
+        assert conn.execute("SELECT typeof(exif_data) FROM photos").fetchone()[0] == "blob"
+        assert store.get_photo_metadata("/tmp/exif.jpg").exif_data["37500"] == "x" * 4096
+        conn.execute("UPDATE photos SET exif_data = ?", ('{"37500": "' + "y" * 4096 + '"}',))
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        store.close()
+        store = MetadataStore(temp_db)
+        assert store._connect().execute("SELECT typeof(exif_data) FROM photos").fetchone()[0] == "blob"
+        assert store.get_photo_metadata("/tmp/exif.jpg").exif_data == {"37500": "y" * 4096}
+        
+        image_path = tmp_path / "beach.jpg"
+        Image.new("RGB", (8, 8)).save(image_path)
+        store.save_analysis_result(AnalysisResult(
+            photo_path=str(image_path.resolve()),
+            llm_model="mock",
+            description="海边的日落",
+            tags=["海滩", "日落"],
+            generated_at=datetime.now()
+        ))
+        results = store.search_photos("海滩")
+        assert len(results) == 1
+        assert results[0]["tags"] == ["海滩", "日落"]
+    
     def test_save_and_retrieve_analysis_result(self, temp_db):
         """Test saving and retrieving analysis results."""
         store = MetadataStore(temp_db)
@@ -205,6 +334,225 @@ class TestMetadataStore:
         assert len(results) >= 1
         assert any("sunset" in str(item).lower() for item in results)
     
+    def test_get_existing_paths(self, temp_db, tmp_path):
+        """Test bulk lookup of already analyzed photo paths."""
+        from PIL import Image
+        
+        store = MetadataStore(temp_db)
+        
+        paths = []
+        for name in ("a", "b"):
+            image_path = tmp_path / f"{name}.jpg"
+            Image.new("RGB", (8, 8)).save(image_path)
+            paths.append(str(image_path.resolve()))
+        
+        result = AnalysisResult(
+            photo_path=paths[0],
+            llm_model="gemini-1.5-pro-vision",
+            description="Test description",
+            generated_at=datetime.now()
+        )
+        store.save_analysis_result(result)
+        
+        lookup = paths + [str(tmp_path / "missing.jpg")]
+        assert store.get_existing_paths("gemini-1.5-pro-vision", lookup) == {paths[0]}
+        assert store.get_existing_paths("other-model", lookup) == set()
+        assert store.get_existing_paths("gemini-1.5-pro-vision", []) == set()
+    
+    def test_get_analyses_by_content_hash(self, temp_db, tmp_path):
+        """Test that identical files can be matched to an existing analysis."""
+        import shutil
+        from PIL import Image
+        from opencode_testing.photo_search.models import compute_content_hash
+        
+        store = MetadataStore(temp_db)
+        
+        original = tmp_path / "original.jpg"
+        Image.new("RGB", (8, 8), "red").save(original)
+        copy = tmp_path / "copy.jpg"
+        shutil.copyfile(original, copy)
+        other = tmp_path / "other.jpg"
+        Image.new("RGB", (8, 8), "blue").save(other)
+        
+        store.save_analysis_result(AnalysisResult(
+            photo_path=str(original.resolve()),
+            llm_model="model-a",
+            description="A red square",
+            generated_at=datetime.now()
+        ))
+        
+        copy_hash = compute_content_hash(str(copy))
+        other_hash = compute_content_hash(str(other))
+        found = store.get_analyses_by_content_hash("model-a", [copy_hash, other_hash])
+        assert list(found) == [copy_hash]
+        assert found[copy_hash].description == "A red square"
+        assert store.get_analyses_by_content_hash("model-b", [copy_hash]) == {}
+    
+    def test_find_duplicate_analyses(self, temp_db, tmp_path, monkeypatch):
+        """Test that copies reuse an analysis and stored hashes are not recomputed."""
+        import shutil
+        from PIL import Image
+        from opencode_testing.photo_search import metadata_store
+        
+        store = MetadataStore(temp_db)
+        
+        original = tmp_path / "original.jpg"
+        Image.new("RGB", (8, 8), "red").save(original)
+        copy = tmp_path / "copy.jpg"
+        shutil.copyfile(original, copy)
+        store.save_analysis_result(AnalysisResult(
+            photo_path=str(original.resolve()),
+            llm_model="model-a",
+            description="A red square",
+            generated_at=datetime.now()
+        ))
+        
+        hashed = []
+        compute = metadata_store.compute_content_hash
+        monkeypatch.setattr(metadata_store, "compute_content_hash", lambda path: hashed.append(path) or compute(path))
+        paths = [str(original.resolve()), str(copy.resolve()), str(tmp_path / "missing.jpg")]
+        found = store.find_duplicate_analyses("model-a", paths)
+        assert sorted(found) == sorted(paths[:2])
+        assert found[paths[1]].photo_path == paths[1]
+        assert found[paths[1]].description == "A red square"
+        assert hashed == paths[1:]
+        
+        # Saving a result that carries its hash does not read the file again
+        hashed.clear()
+        store.save_analysis_result(found[paths[1]])
+        assert hashed == []
+        assert store.get_photo_metadata(paths[1]).content_hash == found[paths[1]].content_hash
+    
+    def test_search_photos_full_text(self, temp_db, tmp_path):
+        """Test that indexed search keeps substring, case-insensitive matching."""
+        from PIL import Image
+        
+        store = MetadataStore(temp_db)
+        
+        image_path = tmp_path / "beach.jpg"
+        Image.new("RGB", (8, 8)).save(image_path)
+        result_ids = [
+            store.save_analysis_result(AnalysisResult(
+                photo_path=str(image_path.resolve()),
+                llm_model=model,
+                description="Sunset over the Ocean",
+                tags=["beach", "evening"],
+                generated_at=datetime.now()
+            ))
+            for model in ("model-a", "model-b", "model-a")
+        ]
+        # Saving again updates the existing row in place
+        assert result_ids[0] == result_ids[2] != result_ids[1]
+        # Re-saving replaces the indexed row instead of duplicating it
+        store.save_analysis_results_batch([AnalysisResult(
+            photo_path=str(image_path.resolve()),
+            llm_model="model-a",
+            description="Sunset over the Ocean",
+            tags=["beach", "evening"],
+            generated_at=datetime.now()
+        )])
+        
+        assert len(store.search_photos("ocean")) == 2
+        assert len(store.search_photos("unset")) == 2
+        assert len(store.search_photos("evening")) == 2
+        assert len(store.search_photos("ev")) == 2  # too short for the index, uses LIKE
+        assert store.search_photos("mountain") == []
+    
+    def test_save_analysis_results_batch(self, temp_db, tmp_path):
+        """Test saving several analysis results in one transaction."""
+        from dataclasses import replace
+        from PIL import Image
+        
+        store = MetadataStore(temp_db)
+        
+        results = []
+        for i in range(3):
+            image_path = tmp_path / f"batch{i}.jpg"
+            Image.new("RGB", (8, 8)).save(image_path)
+            results.append(AnalysisResult(
+                photo_path=str(image_path.resolve()),
+                llm_model="gemini-1.5-pro-vision",
+                description=f"Batch photo {i}",
+                tags=[f"tag{i}"],
+                generated_at=datetime.now()
+            ))
+        
+        store.save_analysis_results_batch(results)
+        
+        for result in results:
+            retrieved = store.get_analysis_result(result.photo_path, "gemini-1.5-pro-vision")
+            assert retrieved is not None
+            assert retrieved.description == result.description
+            assert retrieved.tags == result.tags
+        
+        # One unreadable photo fails the batch; the others are saved one by one
+        bad = AnalysisResult(
+            photo_path=str(tmp_path / "missing.jpg"),
+            llm_model="other-model",
+            description="Missing photo",
+            generated_at=datetime.now()
+        )
+        retried = [replace(result, llm_model="other-model") for result in results]
+        assert store.save_analysis_results_with_fallback([bad] + retried) == 1
+        assert all(store.get_analysis_result(result.photo_path, "other-model") for result in retried)
+    
+    def test_batch_store_flushes_in_order(self, temp_db, tmp_path):
+        """Test that batches filled while another flushes are committed in order."""
+        import asyncio
+        from PIL import Image
+        from opencode_testing.photo_search.metadata_store import BatchMetadataStore
+        
+        store = BatchMetadataStore(temp_db, batch_size=1)
+        image_path = tmp_path / "batch.jpg"
+        Image.new("RGB", (8, 8)).save(image_path)
+        results = [
+            AnalysisResult(
+                photo_path=str(image_path.resolve()),
+                llm_model="mock",
+                description=f"Version {i}",
+                generated_at=datetime.now()
+            )
+            for i in range(5)
+        ]
+        
+        async def save_all():
+            await asyncio.gather(*(store.save_analysis_result_batch(result) for result in results))
+            await store.flush_batch()
+        
+        asyncio.run(save_all())
+        assert store.get_analysis_result(results[0].photo_path, "mock").description == "Version 4"
+    
+    def test_unchanged_photos_not_reread(self, temp_db, tmp_path, monkeypatch):
+        """Test that saving results only re-reads photos that are new or changed."""
+        from PIL import Image
+        
+        store = MetadataStore(temp_db)
+        
+        image_path = tmp_path / "same.jpg"
+        Image.new("RGB", (8, 8)).save(image_path)
+        result = AnalysisResult(
+            photo_path=str(image_path.resolve()),
+            llm_model="mock",
+            description="A photo",
+            generated_at=datetime.now()
+        )
+        store.save_analysis_results_batch([result])
+        
+        extracted = []
+        extract = store._metadata_from_path
+        monkeypatch.setattr(
+            store, "_metadata_from_path",
+            lambda path, content_hash=None: extracted.append(path) or extract(path, content_hash)
+        )
+        store.save_analysis_results_batch([result])
+        assert extracted == []
+        
+        Image.new("RGB", (16, 16)).save(image_path)
+        os.utime(image_path, (0, 0))
+        store.save_analysis_result(result)
+        assert extracted == [result.photo_path]
+        assert store.get_photo_metadata(result.photo_path).image_width == 16
+    
     def test_get_stats(self, temp_db):
         """Test getting database statistics."""
         store = MetadataStore(temp_db)
@@ -240,6 +588,173 @@ class TestMetadataStore:
         assert stats["total_photos"] >= 3
         assert stats["total_analyses"] >= 3
         assert stats["models_used"] >= 1
+        assert sum(stats["per_model"].values()) == stats["total_analyses"]
+
+
+class TestPhotoScanner:
+    """Test photo directory scanning."""
+    
+    def test_iter_photos(self, tmp_path):
+        """Test that iter_photos streams photos and validates the directory eagerly."""
+        from PIL import Image
+        from opencode_testing.photo_search.scanner import iter_photos
+        
+        (tmp_path / "sub").mkdir()
+        Image.new("RGB", (8, 8)).save(tmp_path / "a.jpg")
+        Image.new("RGB", (8, 8)).save(tmp_path / "sub" / "b.PNG")
+        (tmp_path / "notes.txt").write_text("not a photo")
+        
+        photos = iter_photos(str(tmp_path))
+        assert not isinstance(photos, list)
+        assert sorted(p.filename for p in photos) == ["a.jpg", "b.PNG"]
+        assert [p.filename for p in iter_photos(str(tmp_path), recursive=False)] == ["a.jpg"]
+        
+        with pytest.raises(ValueError):
+            iter_photos(str(tmp_path / "missing"))
+
+
+class TestPhotoAnalyzer:
+    """Test the shared analyzer batching logic."""
+    
+    def test_iter_analyze_async(self):
+        """Test that results stream per photo and failures are skipped."""
+        import asyncio
+        import time
+        from opencode_testing.photo_search.gemini_client_new import MockPhotoAnalyzer
+        
+        class FlakyAnalyzer(MockPhotoAnalyzer):
+            def analyze_photo(self, image_path, prompt=None, language=None):
+                if image_path.endswith("bad.jpg"):
+                    raise RuntimeError("analysis failed")
+                if image_path == "a.jpg":
+                    time.sleep(0.05)
+                return super().analyze_photo(image_path, prompt)
+        
+        analyzer = FlakyAnalyzer(model="mock")
+        paths = ["a.jpg", "bad.jpg", "b.jpg", "c.jpg"]
+        
+        async def collect():
+            return [r.photo_path async for r in analyzer.iter_analyze_async(paths, batch_size=2)]
+        
+        assert sorted(asyncio.run(collect())) == ["a.jpg", "b.jpg", "c.jpg"]
+        
+        # Paths can be streamed; they are read as the window advances
+        async def collect_stream():
+            stream = (path for path in paths)
+            return [r.photo_path async for r in analyzer.iter_analyze_async(stream, batch_size=2)]
+        
+        assert sorted(asyncio.run(collect_stream())) == ["a.jpg", "b.jpg", "c.jpg"]
+        # The slow first photo finishes last but keeps its place
+        results = asyncio.run(analyzer.batch_analyze_async(paths))
+        assert [r.photo_path for r in results] == ["a.jpg", "b.jpg", "c.jpg"]
+
+    def test_iter_analyze(self):
+        """Test that sync results stream lazily in order and failures are skipped."""
+        from opencode_testing.photo_search.gemini_client_new import MockPhotoAnalyzer
+        
+        class FlakyAnalyzer(MockPhotoAnalyzer):
+            def analyze_photo(self, image_path, prompt=None, language=None):
+                if image_path.endswith("bad.jpg"):
+                    raise RuntimeError("analysis failed")
+                return super().analyze_photo(image_path, prompt)
+        
+        analyzer = FlakyAnalyzer(model="mock")
+        consumed = []
+        
+        def paths():
+            for path in ["a.jpg", "bad.jpg", "b.jpg"]:
+                consumed.append(path)
+                yield path
+        
+        results = analyzer.iter_analyze(paths())
+        assert next(results).photo_path == "a.jpg"
+        assert consumed == ["a.jpg"]
+        assert [r.photo_path for r in results] == ["b.jpg"]
+    
+    def test_iter_analyze_async_multi_image(self):
+        """Test that photos are grouped into multi-image requests."""
+        import asyncio
+        import json
+        from opencode_testing.photo_search.gemini_client_new import MockPhotoAnalyzer
+        
+        class GroupingAnalyzer(MockPhotoAnalyzer):
+            requests = []
+            
+            def set_images_per_request(self, images_per_request):
+                self._images_per_request = images_per_request
+            
+            async def analyze_photos_async(self, image_paths, prompt=None, language=None):
+                self.requests.append(list(image_paths))
+                response = json.dumps([{"description": f"photo {p}", "tags": ["x"]} for p in image_paths])
+                return self._parse_batch_response(f"```json\n{response}\n```", image_paths)
+        
+        analyzer = GroupingAnalyzer(model="mock")
+        analyzer.set_images_per_request(3)
+        paths = [f"p{i}.jpg" for i in range(7)]
+        
+        results = asyncio.run(analyzer.batch_analyze_async(paths, batch_size=3))
+        assert sorted(r.photo_path for r in results) == paths
+        # The trailing single photo goes through the one-image path
+        assert sorted(len(group) for group in analyzer.requests) == [3, 3]
+        descriptions = {r.photo_path: r.description for r in results}
+        assert descriptions["p0.jpg"] == "photo p0.jpg"
+        assert descriptions["p6.jpg"] == "A photo titled p6.jpg"
+        
+        with pytest.raises(ValueError):
+            analyzer._parse_batch_response('[{"description": "only one"}]', ["a.jpg", "b.jpg"])
+
+    
+    def test_rate_limiter_spaces_request_starts(self):
+        """Test that the limiter waits before requests, never after the last one."""
+        import asyncio
+        import time
+        from opencode_testing.photo_search.gemini_client_new import AdaptiveRateLimiter
+        
+        limiter = AdaptiveRateLimiter(initial_delay=0.05)
+        
+        async def acquire_all():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+            return time.monotonic() - start
+        
+        # The first request starts at once; the others are spaced by the delay
+        elapsed = asyncio.run(acquire_all())
+        assert 0.09 <= elapsed < 0.5
+        
+        # Synchronous callers back off on rate limit errors too
+        limiter.adjust_delay_sync(success=False, rate_limited=True)
+        assert limiter.delay > 0.05
+        start = time.monotonic()
+        limiter.acquire_sync()
+        assert time.monotonic() - start >= 0.05
+
+    
+    def test_extract_json(self):
+        """Test that only the first balanced JSON value is extracted."""
+        from opencode_testing.photo_search.base import extract_json
+        
+        text = 'Result:\n```json\n{"description": "a {curly} \\"quote\\"", "tags": ["x"]}\n```\nNote: {not json}'
+        assert json.loads(extract_json(text)) == {"description": 'a {curly} "quote"', "tags": ["x"]}
+        assert extract_json('[{"a": "]"}, {"b": 2}] trailing', "[") == '[{"a": "]"}, {"b": 2}]'
+        assert extract_json("no json here") is None
+        assert extract_json('{"unterminated": 1') is None
+    
+    def test_parse_response(self):
+        """Test parsing bare JSON, wrapped JSON and unparseable responses."""
+        from opencode_testing.photo_search.gemini_client_new import MockPhotoAnalyzer
+        
+        analyzer = MockPhotoAnalyzer()
+        result = analyzer._parse_response('{"description": "beach", "tags": ["sea"]}', "a.jpg")
+        assert result.description == "beach"
+        assert result.tags == ["sea"]
+        
+        result = analyzer._parse_response('```json\n{"description": "park"}\n```', "a.jpg")
+        assert result.description == "park"
+        assert result.tags == []
+        
+        result = analyzer._parse_response(" A plain description ", "a.jpg")
+        assert result.description == "A plain description"
+        assert result.photo_path == "a.jpg"
 
 
 @pytest.mark.integration
@@ -261,12 +776,25 @@ class TestIntegration:
         from opencode_testing.cli import cli
         import click
         
-        # Check that photos command is registered
-        assert 'photos' in cli.commands
+        # Check that photos command is registered (loaded lazily)
+        ctx = click.Context(cli)
+        assert 'photos' in cli.list_commands(ctx)
         
         # Check subcommands
-        photos_cmd = cli.commands['photos']
+        photos_cmd = cli.get_command(ctx, 'photos')
         assert isinstance(photos_cmd, click.Group)
-        assert 'scan' in photos_cmd.commands
-        assert 'search' in photos_cmd.commands
-        assert 'stats' in photos_cmd.commands
\ No newline at end of file
+        assert photos_cmd.list_commands(ctx) == ['scan', 'search', 'stats']
+        for name in ('scan', 'search', 'stats'):
+            assert isinstance(photos_cmd.get_command(ctx, name), click.Command)
+    
+    def test_fast_search_falls_back_to_click(self, capsys):
+        """Test that the search fast path defers anything it cannot parse."""
+        from opencode_testing.cli_commands.search import _fast_search
+        
+        assert _fast_search([]) is False
+        assert _fast_search(["--help"]) is False
+        assert _fast_search(["cozy", "--limit"]) is False
+        assert _fast_search(["cozy", "--limit", "x"]) is False
+        assert _fast_search(["cozy", "--output-format", "xml"]) is False
+        assert _fast_search(["cozy", "extra"]) is False
+        assert capsys.readouterr().out == ""